@@ -17,7 +17,10 @@ from views.workflow_processor import WorkflowProcessor
 from views.workflow_service import (
     execute_workflow_actions,
     get_user_info,
+    get_workflow,
     process_with_gemini,
+    remove_workflow,
+    workflow_json_response,
     workflows_db,
 )
 
@@ -200,7 +203,7 @@ async def process_chat_message(message: ChatMessage, request: Request):
             if github_integration:
                 GITHUB_TOKEN = github_integration["encrypted_token"]
                 GITHUB_OWNER = github_integration["username"]
-                print(f"Using GitHub token for {GITHUB_OWNER}: {GITHUB_TOKEN}")
+                logger.debug("Using GitHub integration for %s", GITHUB_OWNER)
                 break
         elif con == "slack":
             slack_integration = next(
@@ -213,14 +216,17 @@ async def process_chat_message(message: ChatMessage, request: Request):
             )
             if slack_integration:
                 SLACK_TOKEN = slack_integration["encrypted_token"]
-                print(f"Using Slack token: {SLACK_TOKEN}")
+                logger.debug("Using Slack integration for %s", user_email)
                 break
 
     processor = WorkflowProcessor(
         gemini_api_key=GEMINI_API_KEY, github_token=GITHUB_TOKEN, github_owner=GITHUB_OWNER, slack_token=SLACK_TOKEN
     )
 
-    response = processor.process_query(message.message)
+    try:
+        response = await processor.aprocess_query(message.message)
+    finally:
+        await processor.aclose()
 
     # workflow_id = None
     # actions_taken = []
@@ -253,11 +259,11 @@ async def get_workflow_history(request: Request):
     user_workflows = []
 
     for workflow in workflows_db.values():
-        if workflow["user_email"] == user_info["email"]:
+        if workflow.user_email == user_info["email"]:
             user_workflows.append(workflow)
-    user_workflows.sort(key=lambda x: x["created_at"], reverse=True)
+    user_workflows.sort(key=lambda x: x.created_at, reverse=True)
 
-    return user_workflows
+    return workflow_json_response(user_workflows)
 
 
 @router.get("/workflows/{workflow_id}")
@@ -265,14 +271,14 @@ async def get_workflow_details(workflow_id: str, request: Request):
     """Get detailed information about a specific workflow"""
     user_info = get_user_info(request)
 
-    workflow = workflows_db.get(workflow_id)
+    workflow = get_workflow(workflow_id)
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
 
-    if workflow["user_email"] != user_info["email"]:
+    if workflow.user_email != user_info["email"]:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return workflow
+    return workflow_json_response(workflow)
 
 
 @router.delete("/workflows/{workflow_id}")
@@ -284,10 +290,10 @@ async def delete_workflow(workflow_id: str, request: Request):
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
 
-    if workflow["user_email"] != user_info["email"]:
+    if workflow.user_email != user_info["email"]:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    del workflows_db[workflow_id]
+    remove_workflow(workflow_id)
 
     return {"message": "Workflow deleted successfully", "workflow_id": workflow_id}
 
@@ -299,12 +305,12 @@ async def get_user_stats(request: Request):
     integrations_count = sum(
         1 for integration in integrations_db.values() if integration["user_email"] == user_info["email"]
     )
-    workflows_count = sum(1 for workflow in workflows_db.values() if workflow["user_email"] == user_info["email"])
-    completed_workflows = sum(
-        1
-        for workflow in workflows_db.values()
-        if (workflow["user_email"] == user_info["email"] and workflow["status"] == "completed")
-    )
+    # One pass over the workflow history for both counts.
+    workflows_count = completed_workflows = 0
+    for workflow in workflows_db.values():
+        if workflow.user_email == user_info["email"]:
+            workflows_count += 1
+            completed_workflows += workflow.status == "completed"
 
     return {
         "integrations_count": integrations_count,
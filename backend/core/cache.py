@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import shelve
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Bounded TTL cache for LLM results with an optional semantic tier.
+
+    Lookups first try an exact match on the normalized prompt key. Entries stored
+    with an embedding can also be served for a different prompt whose embedding has
+    a cosine similarity of at least ``similarity_threshold``.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        similarity_threshold: float = 0.92,
+        persist_path: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.persist_path = persist_path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.semantic_hits = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()  # key -> unit-length embedding
+        # _vectors stacked into one (N, D) matrix for a single matmul per lookup; rebuilt after writes.
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: list = []
+        self._shelf: Optional[shelve.Shelf] = None
+
+    @staticmethod
+    def key_for(text: str, namespace: str = "") -> str:
+        """Hashes the text, scoped by ``namespace`` (e.g. task and model), into a cache key.
+
+        Only whitespace is normalized: case can be meaningful in extracted parameters such as
+        repository and branch names.
+        """
+        return hashlib.blake2b(f"{namespace}:{' '.join(text.split())}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for an exact key, or None on a miss."""
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size, for logging or a metrics endpoint."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "semantic_hits": self.semantic_hits,
+            "size": len(self._entries),
+        }
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        self._load()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get_similar(self, embedding: Sequence[float]) -> Optional[Any]:
+        """Returns the value whose embedding is closest to ``embedding`` if it clears the threshold."""
+        if not self.enabled or not self._vectors:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._vectors)
+            self._matrix = np.stack(list(self._vectors.values()))
+        scores = self._matrix @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        value = self._lookup(self._matrix_keys[best])
+        if value is not None:
+            self.semantic_hits += 1
+        return value
+
+    def set(self, key: str, value: Any, embedding: Optional[Sequence[float]] = None) -> None:
+        """Stores a value; passing an embedding also makes it eligible for similarity lookups."""
+        if not self.enabled:
+            return
+        self._load()
+        stored_at = time.monotonic()
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        if embedding is not None:
+            self._vectors[key] = self._normalize(embedding)
+            self._matrix = None
+        if self._shelf is not None:
+            self._shelf[key] = (time.time(), value)
+        while len(self._entries) > self.maxsize:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._vectors.pop(key, None) is not None:
+            self._matrix = None
+        if self._shelf is not None and key in self._shelf:
+            del self._shelf[key]
+
+    def _load(self) -> None:
+        """Opens the on-disk shelf on first use and restores the entries that are still fresh.
+
+        If the shelf can't be opened (bad path, locked or corrupt file) the cache stays memory-only.
+        """
+        if self.persist_path is None or self._shelf is not None:
+            return
+        try:
+            self._shelf = shelve.open(self.persist_path)
+        except Exception as e:
+            logger.warning("Could not open cache file %s, caching in memory only: %s", self.persist_path, e)
+            self.persist_path = None
+            return
+        now_wall, now_mono = time.time(), time.monotonic()
+        for key, (saved_at, value) in sorted(self._shelf.items(), key=lambda item: item[1][0]):
+            age = now_wall - saved_at
+            if age <= self.ttl:
+                self._entries[key] = (now_mono - age, value)
+            else:
+                del self._shelf[key]
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,40 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import google.generativeai as genai
+
+from core.cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# embed_content is blocking; every embedding, for chat replies and classifications alike, runs here.
+_EMBED_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed")
+# A chat message is embedded for the reply cache and again as the query the processor classifies;
+# the vectors are kept briefly so the second lookup is free.
+_EMBEDDINGS = ResponseCache(maxsize=256, ttl=600)
+
+
+async def embed_text(text: str) -> Optional[List[float]]:
+    """Embeds the normalized text for a semantic cache tier; None if embedding is unavailable."""
+    content = text.strip().lower()
+    key = ResponseCache.key_for(content, namespace=EMBEDDING_MODEL)
+    embedding = _EMBEDDINGS.get(key)
+    if embedding is not None:
+        return embedding
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            _EMBED_POOL, functools.partial(genai.embed_content, model=EMBEDDING_MODEL, content=content)
+        )
+    except Exception as e:
+        logger.warning("Embedding failed, skipping semantic cache: %s", e)
+        return None
+    _EMBEDDINGS.set(key, result["embedding"])
+    return result["embedding"]
+
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from apis.base import api_router
+from views.workflow_processor import aclose_shared_pools
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +31,12 @@ app.add_middleware(
 include_router(app)
 
 
+@app.on_event("shutdown")
+async def close_http_pools():
+    """Close the GitHub/Slack connection pools shared by workflow processors."""
+    await aclose_shared_pools()
+
+
 # Serve static files (frontend)
 if os.path.exists("../frontend"):
     app.mount("/static", StaticFiles(directory="../frontend"), name="static")
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The app imports its packages (core, views, apis) relative to backend/, as uvicorn runs it from there.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def processor():
+    """A processor with placeholder credentials; building one makes no network calls."""
+    from views.workflow_processor import WorkflowProcessor
+
+    return WorkflowProcessor(gemini_api_key="test-key", github_token="", slack_token="", github_owner="octo")
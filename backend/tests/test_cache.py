@@ -0,0 +1,64 @@
+from core.cache import ResponseCache
+
+
+def test_key_for_normalizes_whitespace_but_keeps_case():
+    assert ResponseCache.key_for("  list issues\tin  repo api ") == ResponseCache.key_for("list issues in repo api")
+    assert ResponseCache.key_for("repo API") != ResponseCache.key_for("repo api")
+    assert ResponseCache.key_for("hi", namespace="a") != ResponseCache.key_for("hi", namespace="b")
+
+
+def test_exact_hit_and_miss():
+    cache = ResponseCache()
+    cache.set("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    assert cache.get("other") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_dropped():
+    cache = ResponseCache(ttl=-1)
+    cache.set("k", 1)
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_similar_embedding_is_served_above_threshold():
+    cache = ResponseCache(similarity_threshold=0.9)
+    cache.set("hello", "greeting", embedding=[1.0, 0.0])
+    cache.set("exact only", "params")
+    assert cache.get_similar([0.99, 0.05]) == "greeting"
+    assert cache.get_similar([0.0, 1.0]) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(enabled=False)
+    cache.set("k", 1, embedding=[1.0])
+    assert cache.get("k") is None
+    assert cache.get_similar([1.0]) is None
+
+
+def test_persisted_entries_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache")
+    ResponseCache(persist_path=path).set("k", {"v": 1})
+    assert ResponseCache(persist_path=path).get("k") == {"v": 1}
+
+
+def test_unopenable_shelf_falls_back_to_memory(tmp_path):
+    cache = ResponseCache(persist_path=str(tmp_path / "missing" / "cache"))
+    assert cache.get("k") is None
+    assert cache.persist_path is None
+    cache.set("k", 1)
+    assert cache.get("k") == 1
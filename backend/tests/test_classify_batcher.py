@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from views.workflow_processor import _ClassifyBatcher
+
+
+class _FakeProcessor:
+    """Stands in for WorkflowProcessor.classify_batch, recording each call's queries."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def classify_batch(self, queries):
+        self.batches.append(list(queries))
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("gemini unavailable")
+        return [{"action_type": "general_response", "query": query} for query in queries]
+
+
+def test_queries_arriving_during_a_call_share_the_next_one():
+    processor = _FakeProcessor()
+
+    async def run():
+        batcher = _ClassifyBatcher()
+        first = asyncio.ensure_future(batcher.classify(processor, "q0"))
+        await asyncio.sleep(0.01)
+        rest = [asyncio.ensure_future(batcher.classify(processor, f"q{i}")) for i in range(1, 4)]
+        results = await asyncio.gather(first, *rest)
+        batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert processor.batches == [["q0"], ["q1", "q2", "q3"]]
+    assert [result["query"] for result in results] == ["q0", "q1", "q2", "q3"]
+
+
+def test_call_failure_reaches_every_waiting_query():
+    processor = _FakeProcessor(fail=True)
+
+    async def run():
+        batcher = _ClassifyBatcher()
+        try:
+            return await asyncio.gather(batcher.classify(processor, "a"), batcher.classify(processor, "b"))
+        finally:
+            batcher.close()
+
+    with pytest.raises(RuntimeError, match="gemini unavailable"):
+        asyncio.run(run())
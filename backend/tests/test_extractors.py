@@ -0,0 +1,60 @@
+import pytest
+
+from views.workflow_processor import _fast_classify
+
+
+@pytest.mark.parametrize(
+    "query, field, expected",
+    [
+        ("list issues in repo devcascade", "repo_name", "devcascade"),
+        ("Show issues in repo DevCascade", "repo_name", "DevCascade"),
+        ("show issue #42 in the backend repo", "repo_name", "backend"),
+        ("comment on issue 7 for project api-gateway", "repo_name", "api-gateway"),
+        ("show issue #42 in the backend repo", "issue_number", 42),
+        ("close bug 15 in repo web", "issue_number", 15),
+        ("switch to feature-x", "branch_name", "feature-x"),
+        ("checkout dev", "branch_name", "dev"),
+        ("create branch hotfix/login from main", "branch_name", "hotfix/login"),
+        ("create branch hotfix/login from main", "source_branch", "main"),
+        ("create a branch release based on develop", "source_branch", "develop"),
+    ],
+)
+def test_extract_all(processor, query, field, expected):
+    assert processor._extract_all(query)[field] == expected
+
+
+def test_extract_all_returns_every_field(processor):
+    assert processor._extract_all("hello there") == {
+        "repo_name": None,
+        "issue_number": None,
+        "branch_name": None,
+        "source_branch": None,
+    }
+
+
+def test_single_field_extractors_match_extract_all(processor):
+    query = "create branch hotfix/login from main"
+    extracted = processor._extract_all(query)
+    assert processor._extract_repo_name(query) == extracted["repo_name"]
+    assert processor._extract_issue_number(query) == extracted["issue_number"]
+    assert processor._extract_branch_name(query) == "hotfix/login"
+    assert processor._extract_source_branch(query) == "main"
+
+
+def test_extract_branch_name(processor):
+    assert processor._extract_branch_name("switch to feature-x") == "feature-x"
+
+
+def test_extract_issue_number_is_int(processor):
+    assert processor._extract_issue_number("show issue #42 in repo api") == 42
+
+
+def test_fast_classify_full_match():
+    parsed = _fast_classify("show details for issue #12 in repo api-gateway")
+    assert parsed["action_type"] == "github_get_issue"
+    assert parsed["issue_number"] == 12
+    assert parsed["repo_name"] == "api-gateway"
+
+
+def test_fast_classify_leaves_partial_matches_to_gemini():
+    assert _fast_classify("list issues in repo api-gateway and tell the team on slack") is None
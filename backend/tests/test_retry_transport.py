@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from views.workflow_processor import _RetryTransport
+
+
+def _send(method, statuses, **kwargs):
+    """Sends one request through a _RetryTransport over canned replies; returns (status, attempts).
+
+    ``statuses`` holds a status code or a (status, headers) pair per attempt; the last one repeats.
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        reply = statuses[min(len(calls), len(statuses)) - 1]
+        status, headers = reply if isinstance(reply, tuple) else (reply, {})
+        return httpx.Response(status, headers=headers)
+
+    async def run():
+        transport = _RetryTransport(httpx.MockTransport(handler), backoff_factor=0, **kwargs)
+        async with httpx.AsyncClient(transport=transport, base_url="https://api.example.com") as client:
+            return await client.request(method, "/resource")
+
+    return asyncio.run(run()).status_code, len(calls)
+
+
+def test_retries_idempotent_request_on_gateway_error():
+    assert _send("GET", [503, 502, 200]) == (200, 3)
+
+
+def test_gives_up_after_total_retries():
+    assert _send("GET", [503], total=2) == (503, 3)
+
+
+def test_does_not_retry_post_on_gateway_error():
+    assert _send("POST", [503, 201]) == (503, 1)
+
+
+def test_retries_rate_limited_post_after_retry_after():
+    assert _send("POST", [(429, {"Retry-After": "0"}), 201]) == (201, 2)
+
+
+def test_plain_forbidden_is_not_retried():
+    assert _send("GET", [403, 200]) == (403, 1)
+
+
+def test_long_rate_limit_wait_is_returned_to_caller():
+    assert _send("GET", [(429, {"Retry-After": "60"}), 200], max_backoff=8.0) == (429, 1)
@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+
+from views.workflow_processor import _EARLY_EXIT_ACTIONS, _loads_model_json, _read_json_object
+
+
+def _read(chunks, **kwargs):
+    """Feeds text chunks to _read_json_object and records how many of them it consumed."""
+    consumed = []
+
+    async def stream():
+        for text in chunks:
+            consumed.append(text)
+            yield SimpleNamespace(text=text)
+
+    return asyncio.run(_read_json_object(stream(), **kwargs)), len(consumed)
+
+
+def test_stops_at_closing_brace():
+    text, consumed = _read(['{"action_type": "github_list_issues", ', '"repo_name": "api"}', "\n\n", "trailing"])
+    assert orjson.loads(text) == {"action_type": "github_list_issues", "repo_name": "api"}
+    assert consumed == 2
+
+
+def test_drops_text_after_the_object_in_the_same_chunk():
+    text, _ = _read(['{"a": 1}  extra'])
+    assert text == '{"a": 1}'
+
+
+def test_braces_inside_strings_do_not_close_the_object():
+    body = 'use {x} and a quote \\" then }'
+    text, _ = _read(['{"issue_body": "', body, '", "n": {"m": 2}}'])
+    assert orjson.loads(text) == {"issue_body": 'use {x} and a quote " then }', "n": {"m": 2}}
+
+
+def test_unterminated_stream_returns_everything():
+    text, consumed = _read(['{"a": ', "1"])
+    assert text == '{"a": 1'
+    assert consumed == 2
+
+
+def test_early_exit_on_leading_action():
+    text, consumed = _read(
+        ['{"action_type": "unhandled", ', '"issue_body": "long"}'], early_exit=_EARLY_EXIT_ACTIONS
+    )
+    assert orjson.loads(text) == {"action_type": "unhandled"}
+    assert consumed == 1
+
+
+def test_early_exit_ignores_other_actions():
+    chunks = ['{"action_type": "general_response", ', '"compound_actions": null}']
+    text, consumed = _read(chunks, early_exit=_EARLY_EXIT_ACTIONS)
+    assert text == "".join(chunks)
+    assert consumed == 2
+
+
+def test_loads_model_json_unwraps_fence():
+    assert _loads_model_json('```json\n{"a": 1}\n```') == {"a": 1}
+    assert _loads_model_json('```json\n{"a": 1}') == {"a": 1}
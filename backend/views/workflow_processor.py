@@ -1,254 +1,1056 @@
-import json
-from typing import Any, Dict, Optional, TypedDict, Union
+import asyncio
+import functools
+import hashlib
+import logging
+import operator
+import os
+import re
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from types import MappingProxyType
+from typing import Annotated, Any, AsyncIterator, Callable, ClassVar, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
 import httpx
 import google.generativeai as genai
-import requests  # type: ignore
+import ijson
+import orjson
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
-import re
+from langgraph.types import Send
+
+from core.cache import ResponseCache
+from core.gemini import GEMINI_CACHE_ENABLED, embed_text
+
+logger = logging.getLogger(__name__)
+
 # Set up Gemini API
 # TODO: Move API keys to environment variables or a secure configuration manager.
 
 
+# Only the first few issues are rendered, so listings fetch one short page and read the total from Link.
+ISSUES_PER_PAGE = 10
+# Action types whose own fields are parameter-free. A result is only served to semantically similar
+# queries if it also has no compound_actions, since those carry repo, issue and Slack parameters.
+SEMANTIC_CACHE_ACTIONS = frozenset({"general_response"})
+CLASSIFICATION_CACHE_PATH = os.getenv("CLASSIFICATION_CACHE_PATH")
+
+ACTION_TYPES = [
+    "github_create_issue",
+    "github_list_issues",
+    "github_get_issue",
+    "github_comment_issue",
+    "github_list_branches",
+    "github_get_branch",
+    "github_create_branch",
+    "slack_send_message",
+    "general_response",
+    "needs_clarification",
+    "unhandled",
+]
+# State fields the classifier extracts besides action_type.
+CLASSIFICATION_FIELDS = (
+    "repo_name",
+    "issue_number",
+    "issue_title",
+    "issue_body",
+    "comment_body",
+    "branch_name",
+    "source_branch",
+    "needs_clarification",
+)
+CLASSIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action_type": {"type": "string", "enum": ACTION_TYPES},
+        "repo_name": {"type": "string", "nullable": True},
+        "issue_number": {"type": "integer", "nullable": True},
+        "issue_title": {"type": "string", "nullable": True},
+        "issue_body": {"type": "string", "nullable": True},
+        "comment_body": {"type": "string", "nullable": True},
+        "branch_name": {"type": "string", "nullable": True},
+        "source_branch": {"type": "string", "nullable": True},
+        "needs_clarification": {"type": "boolean"},
+    },
+    "required": ["action_type"],
+}
+# Independent extra actions requested in the same query; each runs in parallel with the primary one.
+COMPOUND_ACTION_TYPES = frozenset(
+    {
+        "github_create_issue",
+        "github_list_issues",
+        "github_get_issue",
+        "github_comment_issue",
+        "github_list_branches",
+        "github_get_branch",
+        "github_create_branch",
+        "slack_send_message",
+    }
+)
+CLASSIFICATION_SCHEMA["properties"]["compound_actions"] = {
+    "type": "array",
+    "nullable": True,
+    "items": {
+        "type": "object",
+        "properties": {
+            **{name: spec for name, spec in CLASSIFICATION_SCHEMA["properties"].items() if name != "needs_clarification"},
+            "action_type": {"type": "string", "enum": sorted(COMPOUND_ACTION_TYPES)},
+        },
+        "required": ["action_type"],
+    },
+}
+
+# Static classification prompt. The user query is the only variable part and goes last, so
+# every request shares a byte-identical prefix that Gemini's prompt-prefix cache can reuse.
+_CLASSIFY_PROMPT_PREFIX = sys.intern(
+    """You are DevCascade, a smart assistant that understands user requests for DevOps automation.
+
+IMPORTANT: When users want to create an issue, they might describe:
+1. The PROBLEM/BUG they want to report (extract this as the issue content)
+2. WHERE to create it (repository name)
+
+Examples:
+- "raise an issue in repo gc-adi about login bug" → Issue about login bug in gc-adi repo
+- "create issue in backend: API is returning 500 errors" → Issue about API errors in backend repo
+- "report bug in frontend that buttons don't work" → Issue about button bug in frontend repo
+
+BRANCH OPERATIONS:
+- "list branches in repo X" → List all branches in repository X
+- "show branch feature-login in repo X" → Get details for specific branch
+- "create branch hotfix-123 from main in repo X" → Create new branch from source
+- "what branches exist in repo X" → List all branches
+
+For CREATE ISSUE requests, identify:
+- WHAT is the actual problem/issue to report (not the command itself)
+- WHERE to create it (repository)
+
+If the user just says "raise an issue in repo X" without specifying WHAT issue, ask them what problem they want to report.
+
+Respond with a JSON object with these fields:
+- action_type: the action to perform (use needs_clarification when the issue content is missing)
+- repo_name: repository name, or null
+- issue_number: issue number, or null
+- issue_title: short title describing the actual problem, not the command, or null
+- issue_body: detailed description of the problem, not the user's command, or null
+- comment_body: comment text if adding a comment, or null
+- branch_name: branch name for branch operations, or null
+- source_branch: source branch for creating a new branch, or null
+- needs_clarification: true if the user needs to specify what issue to create
+- compound_actions: only if the user asks for more than one independent action, the additional actions after the first, each with the same fields; otherwise null
+
+"""
+)
+_CLASSIFY_PROMPT_TEMPLATE = sys.intern(_CLASSIFY_PROMPT_PREFIX + 'User said: "{user_query}"\n')
+
+GEMINI_MODEL = "gemini-1.5-flash"
+CLASSIFIER_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": CLASSIFICATION_SCHEMA,
+    "temperature": 0.0,
+    "candidate_count": 1,
+    # Room for a full issue_title/issue_body plus compound_actions, each repeating those fields;
+    # the stop ends decoding on anything after the object.
+    "max_output_tokens": 1024,
+    "stop_sequences": ["\n\n"],
+}
+BATCH_CLASSIFIER_GENERATION_CONFIG = {
+    **CLASSIFIER_GENERATION_CONFIG,
+    "response_schema": {"type": "array", "items": CLASSIFICATION_SCHEMA},
+}
+_CLASSIFY_BATCH_INSTRUCTIONS = sys.intern(
+    "Classify each numbered query below independently. Return a JSON array with exactly one object "
+    "per query, in the same order, each using the fields above.\n\n"
+)
+# While a classification call is in flight, queries arriving within this window share the next one.
+CLASSIFY_BATCH_WINDOW = 0.02
+CLASSIFY_BATCH_MAX = 16
+# gemini-1.5-flash output limit; a full batch would otherwise ask for more than the model can return.
+MODEL_MAX_OUTPUT_TOKENS = 8192
+
+
+# The schema's properties come back in alphabetical order, so action_type is the object's first key.
+_LEADING_ACTION_RE = re.compile(r'^\s*(?:```(?:json)?\s*)?\{\s*"action_type"\s*:\s*"(\w+)"')
+# Actions whose other fields are never read: "unhandled" is reclassified locally by
+# _fallback_classification. general_response is not one, since a chat reply can still carry compound_actions.
+_EARLY_EXIT_ACTIONS = frozenset({"unhandled"})
+
+
+async def _read_json_object(chunks: AsyncIterator[Any], early_exit: frozenset = frozenset()) -> str:
+    """Accumulates streamed response text and stops reading once the top-level JSON object closes.
+
+    Braces inside JSON strings are ignored, so only the real closing brace ends the read; any
+    trailing whitespace or tokens the model would still emit are never waited for. If the object
+    opens with an ``action_type`` listed in ``early_exit``, reading stops there and just that
+    field is returned.
+    """
+    parts = []
+    depth = 0
+    in_string = escaped = False
+    action_seen = not early_exit
+    async for chunk in chunks:
+        text = chunk.text
+        if not action_seen:
+            head = "".join(parts) + text
+            match = _LEADING_ACTION_RE.match(head)
+            if match:
+                if match.group(1) in early_exit:
+                    return orjson.dumps({"action_type": match.group(1)}).decode()
+                action_seen = True
+            elif len(head) > 64:
+                action_seen = True  # Not the expected leading key; just read the whole object.
+        for i, ch in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}" and depth:
+                depth -= 1
+                if not depth:
+                    parts.append(text[: i + 1])
+                    return "".join(parts)
+        parts.append(text)
+    return "".join(parts)
+
+
+# Markdown code fence around a JSON payload. The closing fence is optional because a streamed read
+# stops at the closing brace.
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*(?:```\s*)?$", re.DOTALL)
+
+
+def _loads_model_json(text: str) -> Any:
+    """Parses model JSON output, unwrapping a Markdown fence if the model added one anyway."""
+    if text.lstrip().startswith("```"):
+        text = _FENCE_RE.match(text).group(1)
+    return orjson.loads(text)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(api_key: str, name: str) -> genai.GenerativeModel:
+    """Returns a model shared by every processor using this key; GenerativeModel holds no per-request state."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_classifier(api_key: str, name: str) -> genai.GenerativeModel:
+    """Returns the JSON-mode model used to classify a single query."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name, generation_config=CLASSIFIER_GENERATION_CONFIG)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_batch_classifier(api_key: str, name: str) -> genai.GenerativeModel:
+    """Returns the JSON-mode model that classifies several numbered queries into one array."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name, generation_config=BATCH_CLASSIFIER_GENERATION_CONFIG)
+
+
+# Deterministic pre-classifier for unambiguous phrasings; anything these don't match fully goes to Gemini.
+# Named groups are state fields, so a match converts straight into a classification.
+_REPO = r"(?:in|for|of)\s+(?:the\s+)?repo(?:sitory)?\s+(?P<repo_name>[\w-]+(?:\.[\w-]+)*)"
+_BRANCH = r"[\w-]+(?:[./][\w-]+)*"
+_FAST_PATTERNS = [
+    (re.compile(rf"^\s*(?:list|show)\s+(?:all\s+|open\s+)?issues\s+{_REPO}\s*[.!?]?\s*$", re.I), "github_list_issues"),
+    (
+        re.compile(
+            rf"^\s*(?:show|get)(?:\s+me)?\s+(?:the\s+)?details\s+(?:for|of|on)\s+issue\s+#?(?P<issue_number>\d+)\s+{_REPO}\s*[.!?]?\s*$",
+            re.I,
+        ),
+        "github_get_issue",
+    ),
+    (
+        re.compile(
+            rf"^\s*comment\s+on\s+issue\s+#?(?P<issue_number>\d+)\s+{_REPO}\s+saying\s+(?P<quote>['\"]?)(?P<comment_body>.+?)(?P=quote)\s*$",
+            re.I,
+        ),
+        "github_comment_issue",
+    ),
+    (re.compile(rf"^\s*(?:list|show)\s+(?:all\s+)?branches\s+{_REPO}\s*[.!?]?\s*$", re.I), "github_list_branches"),
+    (
+        re.compile(rf"^\s*(?:show|get)\s+branch\s+(?P<branch_name>{_BRANCH})\s+{_REPO}\s*[.!?]?\s*$", re.I),
+        "github_get_branch",
+    ),
+    (
+        re.compile(
+            rf"^\s*create\s+(?:a\s+)?(?:new\s+)?branch\s+(?P<branch_name>{_BRANCH})\s+from\s+(?P<source_branch>{_BRANCH})\s+{_REPO}\s*[.!?]?\s*$",
+            re.I,
+        ),
+        "github_create_branch",
+    ),
+]
+
+
+def _fast_classify(user_query: str) -> Optional[Dict[str, Any]]:
+    """Classifies queries that match a _FAST_PATTERNS entry exactly; None means ask Gemini."""
+    for pattern, action_type in _FAST_PATTERNS:
+        match = pattern.match(user_query)
+        if match is None:
+            continue
+        parsed = dict.fromkeys(CLASSIFICATION_FIELDS)
+        parsed.update(action_type=action_type, error_message=None, needs_clarification=False)
+        parsed.update((field, value) for field, value in match.groupdict().items() if field in parsed)
+        if parsed["issue_number"] is not None:
+            parsed["issue_number"] = int(parsed["issue_number"])
+        return parsed
+    return None
+
+
+# Keyword tables for _fallback_classification: category -> words or phrases that signal it.
+_KEYWORD_GROUPS = {
+    "greeting": ("hello", "hi", "hey", "howdy", "greetings", "good morning", "good afternoon", "good evening"),
+    "question": ("how are you", "what can you do", "help", "what is", "tell me about", "explain"),
+    "create": ("create", "raise", "open", "make", "new", "add"),
+    "issue": ("issue", "issues", "bug", "bugs", "ticket", "tickets", "problem", "problems", "feature", "features"),
+    "list": ("list", "show", "see", "view", "display", "get all", "what are"),
+    "get": ("show", "get", "details"),
+    "comment": ("comment", "reply"),
+    "slack": ("send", "message", "notify", "tell", "slack", "inform"),
+    "branch": ("branch", "branches"),
+    "list_branch": ("list", "show", "see", "view", "display", "get all", "what"),
+    "create_branch": ("create", "make", "new", "add"),
+}
+
+
+def _build_keyword_index() -> Tuple["re.Pattern[str]", Dict[str, frozenset]]:
+    """Fuses every keyword into one alternation and maps each keyword to the categories it signals.
+
+    A phrase also carries the categories of the keywords inside it ("tell me about" -> question and
+    slack), since the regex consumes it as one match and would otherwise hide them.
+    """
+    keywords = {keyword for group in _KEYWORD_GROUPS.values() for keyword in group}
+    categories = {}
+    for keyword in keywords:
+        words = set(keyword.split())
+        categories[keyword] = frozenset(
+            category
+            for category, group in _KEYWORD_GROUPS.items()
+            if any(candidate == keyword or candidate in words for candidate in group)
+        )
+    # Longest first so a phrase wins over the single word it starts with.
+    alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"(?<![\w'-])(?:{alternation})(?![\w'-])"), categories
+
+
+_KEYWORD_RE, _KEYWORD_CATEGORIES = _build_keyword_index()
+
+
+def _keyword_categories(query_lower: str) -> frozenset:
+    """Every _KEYWORD_GROUPS category mentioned in the lower-cased query, found in one regex pass."""
+    return frozenset().union(*map(_KEYWORD_CATEGORIES.__getitem__, _KEYWORD_RE.findall(query_lower)))
+
+# Where the issue description starts in "create an issue about ...", tried in order.
+_CONTENT_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"about\s+(.+?)(?:\s+in\s+|\s*$)",  # "about login bug"
+        r":\s*(.+?)(?:\s+in\s+|\s*$)",  # ": API is broken"
+        r"that\s+(.+?)(?:\s+in\s+|\s*$)",  # "that buttons don't work"
+        r"with\s+(.+?)(?:\s+in\s+|\s*$)",  # "with connection issues"
+    )
+)
+
+
+# Parameter extractors used by the regex fallback; each tuple is tried in order, first match wins.
+_REPO_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"(?:repo|repository|project)\s+([a-zA-Z0-9_-]+)",
+        r"(?:in|to|for)\s+(?:the\s+)?([a-zA-Z0-9_-]+)(?:\s+repo|\s+repository|\s+project)?",
+        r"([a-zA-Z0-9_-]+)(?:\s+repo|\s+repository|\s+project)",
+    )
+)
+_ISSUE_NUMBER_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (r"(?:issue|bug|ticket)\s+#?(\d+)", r"#(\d+)", r"(?:number|num)\s+(\d+)")
+)
+_BRANCH_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"branch\s+([a-zA-Z0-9_/-]+)",
+        r"on\s+([a-zA-Z0-9_/-]+)\s+branch",
+        r"switch\s+to\s+([a-zA-Z0-9_/-]+)",
+        r"checkout\s+([a-zA-Z0-9_/-]+)",
+    )
+)
+_SOURCE_BRANCH_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (r"from\s+([a-zA-Z0-9_/-]+)", r"based\s+on\s+([a-zA-Z0-9_/-]+)", r"off\s+([a-zA-Z0-9_/-]+)")
+)
+
+# The first (preferred) pattern of each field fused into one scan. Every alternative sits in a
+# lookahead, so matches don't consume text another field's pattern starts in ("branch from dev").
+_EXTRACT_RE = re.compile(
+    r"(?=(?:repo|repository|project)\s+(?P<repo_name>[a-zA-Z0-9_-]+))"
+    r"|(?=(?:issue|bug|ticket)\s+#?(?P<issue_number>\d+))"
+    r"|(?=branch\s+(?P<branch_name>[a-zA-Z0-9_/-]+))"
+    r"|(?=from\s+(?P<source_branch>[a-zA-Z0-9_/-]+))",
+    re.IGNORECASE,
+)
+# Lower-priority patterns per field, only consulted when the fused scan found nothing for it. Each
+# comes with the literals one of which any of its patterns needs, so a query without them skips it.
+_EXTRACT_FALLBACKS = {
+    "repo_name": (("in", "to", "for", "repo", "project"), _REPO_PATTERNS[1:]),
+    "issue_number": (("#", "num"), _ISSUE_NUMBER_PATTERNS[1:]),
+    "branch_name": (("branch", "switch", "checkout"), _BRANCH_PATTERNS[1:]),
+    "source_branch": (("based", "off"), _SOURCE_BRANCH_PATTERNS[1:]),
+}
+
+# Slack target extraction: recipient, channel (tried in order) and message (tried in order).
+_SLACK_USER_RE = re.compile(r"(?:to|@)\s*@?([a-zA-Z0-9._-]+)")
+_SLACK_EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)+")
+_SLACK_CHANNEL_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"(?:channel|in|to)\s+#([a-zA-Z0-9_-]+)",  # "to #channel"
+        r"#([a-zA-Z0-9_-]+)",  # Direct "#channel"
+        r"(?:channel|in|to)\s+([a-zA-Z0-9_-]+)",  # "to channel"
+    )
+)
+_SLACK_MESSAGE_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE | re.DOTALL)
+    for pattern in (
+        r'["\']([^"\']+)["\']',  # Quoted strings first
+        r"(?:send|message|notify|tell|inform)\s+(?:slack\s+)?(?:message\s*)?:?\s*(.+?)(?:\s+(?:to|in|@|#)|\s*$)",
+        r"(?:send|message|notify|tell|inform).*?:\s*(.+)",
+    )
+)
+# Trailing "to/in/@/channel ..." left on a candidate message, and any recipient still inside it.
+_SLACK_TAIL_STRIP_RE = re.compile(r"\s+(?:to|@|in|channel)\s+.+$", re.IGNORECASE)
+_SLACK_TARGET_STRIP_RE = re.compile(r"(?:to|@|#)\s*[a-zA-Z0-9._-]+")
+
+
+# action_type -> graph node that handles it.
+_ROUTES = {
+    "github_create_issue": "github_create_issue_node",
+    "github_list_issues": "github_list_issues_node",
+    "github_get_issue": "github_get_issue_node",
+    "github_comment_issue": "github_comment_issue_node",
+    "slack_send_message": "slack_message_node",
+    "unhandled": "unhandled_action_node",
+    "general_response": "general_response_node",
+    "needs_clarification": "needs_clarification_node",
+    "github_list_branches": "github_list_branches_node",
+    "github_get_branch": "github_get_branch_node",
+    "github_create_branch": "github_create_branch_node",
+}
+
+
+# Graph topology: node name -> the WorkflowProcessor method that runs it. Only _build_graph binds these,
+# once per class; every run reaches its processor through the config.
+_GRAPH_NODES = {
+    "classify_and_extract": "_classify_and_extract_parameters_node",
+    "github_create_issue_node": "_create_issue_node",
+    "github_list_issues_node": "_list_issues_node",
+    "github_get_issue_node": "_get_issue_node",
+    "github_comment_issue_node": "_comment_issue_node",
+    "slack_message_node": "_slack_message_node",
+    "unhandled_action_node": "_unhandled_action_node",
+    "general_response_node": "_general_response_node",
+    "needs_clarification_node": "_needs_clarification_node",
+    "github_list_branches_node": "_list_branches_node",
+    "github_get_branch_node": "_get_branch_node",
+    "github_create_branch_node": "_create_branch_node",
+    "secondary_action_node": "_secondary_action_node",
+}
+
+
+# Parameters each GitHub action needs before its node may call the API.
+_REQUIRED_PARAMS = {
+    "github_create_issue": ("repo_name",),
+    "github_list_issues": ("repo_name",),
+    "github_get_issue": ("repo_name", "issue_number"),
+    "github_comment_issue": ("repo_name", "issue_number", "comment_body"),
+    "github_list_branches": ("repo_name",),
+    "github_get_branch": ("repo_name", "branch_name"),
+    "github_create_branch": ("repo_name", "branch_name"),
+}
+_ERR_REPO_MISSING = MappingProxyType({"error": "Repository name not extracted."})
+_ERR_ISSUE_PARAMS_MISSING = MappingProxyType({"error": "Repo name or issue number not extracted."})
+_ERR_COMMENT_PARAMS_MISSING = MappingProxyType({"error": "Repo, issue num, or comment not extracted."})
+_ERR_BRANCH_PARAMS_MISSING = MappingProxyType({"error": "Repository name or branch name not extracted."})
+# action_type -> (api_response, error_message) reported when required parameters are missing.
+_PARAM_ERRORS = {
+    "github_create_issue": (_ERR_REPO_MISSING, "Repo name missing"),
+    "github_list_issues": (_ERR_REPO_MISSING, "Repo name missing"),
+    "github_get_issue": (_ERR_ISSUE_PARAMS_MISSING, "Repo/Issue num missing"),
+    "github_comment_issue": (_ERR_COMMENT_PARAMS_MISSING, "Params missing for comment"),
+    "github_list_branches": (_ERR_REPO_MISSING, "Repo name missing"),
+    "github_get_branch": (_ERR_BRANCH_PARAMS_MISSING, "Repo/Branch name missing"),
+    "github_create_branch": (_ERR_BRANCH_PARAMS_MISSING, "Repo/Branch name missing"),
+}
+
+
+# Reply for queries no action matched; shared by every such response.
+_UNHANDLED_MESSAGE = "I didn't understand your request. Here are some things you can try:"
+_UNHANDLED_SUGGESTIONS = (
+    "Try: 'create an issue in repo my-project'",
+    "Try: 'list issues in repository backend'",
+    "Try: 'show issue #123 in repo frontend'",
+    "Try: 'send a message to the team'",
+)
+
+
+def _missing_params(state: "WorkflowState") -> bool:
+    return any(not getattr(state, field) for field in _REQUIRED_PARAMS.get(state.action_type, ()))
+
+
+def _param_error(state: "WorkflowState") -> Optional[Dict[str, Any]]:
+    """The node update reporting a missing required parameter, or None when all are present."""
+    if not _missing_params(state):
+        return None
+    api_response, error_message = _PARAM_ERRORS[state.action_type]
+    return {"api_response": api_response, "error_message": error_message}
+
+
+# Upper bound on graph branches (compound actions) run at once for a single query.
+GRAPH_MAX_CONCURRENCY = int(os.getenv("WORKFLOW_MAX_PARALLELISM", "4"))
+
+
+def _route_action(state: "WorkflowState") -> Union[str, List[Union[str, Send]]]:
+    """Conditional-edge router: picks the branch key for the classified action.
+
+    Actions missing a required parameter go straight to the unhandled node, which reports them,
+    so the API nodes and helpers can assume their inputs are present.
+    """
+    primary = "unhandled" if state.action_type not in _ROUTES or _missing_params(state) else state.action_type
+    if not state.compound_actions:
+        return primary
+    # Fan the extra actions out as parallel branches of the same superstep.
+    return [primary] + [
+        Send("secondary_action_node", replace(state, compound_actions=None, api_response=None, **action))
+        for action in state.compound_actions
+    ]
+
+
+def _processor_node(method: Callable) -> Callable:
+    """Adapts an unbound node method for the shared graph, taking the processor from the run config."""
+    if asyncio.iscoroutinefunction(method):
+
+        async def node(state: "WorkflowState", config: RunnableConfig) -> Dict[str, Any]:
+            return await method(config["configurable"]["processor"], state)
+
+    else:
+
+        def node(state: "WorkflowState", config: RunnableConfig) -> Dict[str, Any]:
+            return method(config["configurable"]["processor"], state)
+
+    node.__name__ = method.__name__
+    return node
+
+
+def _last_page(links: Dict[str, Dict[str, str]]) -> Optional[int]:
+    """The page number of a paginated GitHub listing's ``last`` link; None for a single page."""
+    last_url = links.get("last", {}).get("url")
+    if not last_url:
+        return None
+    return int(parse_qs(urlparse(last_url).query).get("page", ["1"])[0])
+
+
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+ETAG_CACHE_SIZE = 256
+# Seconds a Slack channel/user name -> id index is trusted before a miss triggers a reload.
+SLACK_DIRECTORY_TTL = 300
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+# event loop -> {(token scope, kind): lock}; keyed like the class-wide Slack directory so concurrent
+# misses from different requests wait for one reload instead of each starting their own.
+_slack_reload_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, asyncio.Lock]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _slack_reload_lock(key: tuple) -> asyncio.Lock:
+    locks = _slack_reload_locks.setdefault(asyncio.get_running_loop(), {})
+    if key not in locks:
+        locks[key] = asyncio.Lock()
+    return locks[key]
+
+
+# Per-service pool sizes. Pools are shared by every processor on an event loop, and HTTP/2
+# multiplexes concurrent requests over the kept-alive connections.
+HTTP_LIMITS = {
+    "github": httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    "slack": httpx.Limits(max_connections=100, max_keepalive_connections=20),
+}
+_DEFAULT_HTTP_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+# Runs independent blocking work (regex extraction) side by side so their latencies
+# overlap with each other and with the Gemini round-trip. One pool for the process: processors are per request.
+_WORKER_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="wf")
+
+# event loop -> {service: pooled transport}; transports are bound to the loop that opened them.
+_shared_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncHTTPTransport]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _pooled_transport(service: str = "") -> httpx.AsyncHTTPTransport:
+    """Keep-alive HTTP/2 transport that also retries failed connection attempts."""
+    return httpx.AsyncHTTPTransport(http2=True, retries=3, limits=HTTP_LIMITS.get(service, _DEFAULT_HTTP_LIMITS))
+
+
+def _service_transport(service: str, auth_headers: Optional[Dict[str, str]] = None) -> "_RetryTransport":
+    """Returns a retrying transport over the running loop's shared pool for ``service``.
+
+    Processors are built per request, so sharing the pool is what lets keep-alive connections
+    outlive a single query. Without a running loop the processor gets a private pool instead.
+    The first caller on a loop that brings credentials (``auth_headers``) also warms the pool up.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _RetryTransport(_pooled_transport(service))
+    pools = _shared_pools.setdefault(loop, {})
+    if service not in pools:
+        pools[service] = _pooled_transport(service)
+    warmed = _warmed_services.setdefault(loop, set())
+    if auth_headers and service in _WARM_UP_REQUESTS and service not in warmed:
+        warmed.add(service)
+        task = loop.create_task(_warm_up(service, pools[service], auth_headers))
+        _warm_up_tasks.add(task)
+        task.add_done_callback(_warm_up_tasks.discard)
+    return _RetryTransport(pools[service], owns_transport=False)
+
+
+# service -> (method, url) of a cheap authenticated call that opens a pooled connection.
+_WARM_UP_REQUESTS = {
+    "github": ("GET", "https://api.github.com/rate_limit"),
+    "slack": ("POST", "https://slack.com/api/auth.test"),
+}
+# event loop -> services whose shared pool has been warmed up (or is being warmed up).
+_warmed_services: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, set]" = weakref.WeakKeyDictionary()
+_warm_up_tasks: set = set()
+
+
+async def _warm_up(service: str, pool: httpx.AsyncHTTPTransport, auth_headers: Dict[str, str]) -> None:
+    """Opens a connection in ``service``'s new pool ahead of the first query; failures are harmless."""
+    method, url = _WARM_UP_REQUESTS[service]
+    try:
+        async with httpx.AsyncClient(
+            transport=_RetryTransport(pool, owns_transport=False), headers=auth_headers, timeout=5
+        ) as client:
+            response = await client.request(method, url)
+    except Exception as e:
+        logger.debug("%s connection warm-up failed: %s", service, e)
+        return
+    # ALPN picks the protocol; HTTP/1.1 here means requests won't share one multiplexed connection.
+    logger.info("%s connection pool warmed up over %s", service, response.http_version)
+
+
+async def aclose_shared_pools() -> None:
+    """Closes the running loop's shared connection pools and batchers; call once at application shutdown."""
+    loop = asyncio.get_running_loop()
+    for batcher in _classify_batchers.pop(loop, {}).values():
+        batcher.close()
+    _warmed_services.pop(loop, None)
+    for transport in _shared_pools.pop(loop, {}).values():
+        await transport.aclose()
+
+
+class _RetryTransport(httpx.AsyncBaseTransport):
+    """Retries idempotent requests that hit a transient gateway error, with exponential backoff.
+
+    Rate-limited responses (429, or 403 carrying GitHub's rate-limit headers) are retried for any
+    method, since the server rejected them unprocessed, after the wait it asks for. A wait longer
+    than ``max_backoff`` is not slept through; the limit response goes back to the caller instead.
+    """
+
+    RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        total: int = 3,
+        backoff_factor: float = 0.2,
+        status_forcelist: frozenset = frozenset({502, 503, 504}),
+        owns_transport: bool = True,
+        max_backoff: float = 8.0,
+    ):
+        self._transport = transport
+        self._owns_transport = owns_transport
+        self._total = total
+        self._backoff_factor = backoff_factor
+        self._status_forcelist = status_forcelist
+        self._max_backoff = max_backoff
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await self._transport.handle_async_request(request)
+            delay = self._rate_limit_delay(response, attempt)
+            if delay is None:
+                if response.status_code not in self._status_forcelist or request.method not in self.RETRY_METHODS:
+                    return response
+                delay = self._backoff_factor * (2**attempt)
+            if attempt >= self._total or delay > self._max_backoff:
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _rate_limit_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response; None if it isn't one."""
+        if response.status_code not in (403, 429):
+            return None
+        headers = response.headers
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        reset = headers.get("X-RateLimit-Reset")
+        if headers.get("X-RateLimit-Remaining") == "0" and reset is not None and reset.isdigit():
+            return max(0.0, int(reset) - time.time())
+        if response.status_code == 429:
+            return self._backoff_factor * (2**attempt)
+        return None  # A plain 403 is a permission error, not a limit.
+
+    async def aclose(self) -> None:
+        # A shared pool stays open when one processor's client closes.
+        if self._owns_transport:
+            await self._transport.aclose()
+
+
+class _ClassifyBatcher:
+    """Groups Gemini classifications from every processor on one event loop into shared calls.
+
+    A query that arrives while no batch call is in flight is sent at once, alone or with whatever is
+    already queued. Only while a call is outstanding do queries wait up to CLASSIFY_BATCH_WINDOW to
+    collect a batch, so batching adds latency only under load, where it saves calls.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._in_flight: set = set()
+        self._worker = asyncio.ensure_future(self._collect())
+
+    async def classify(self, processor: "WorkflowProcessor", user_query: str) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((processor, user_query, future))
+        return await future
+
+    def close(self) -> None:
+        self._worker.cancel()
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self._in_flight:
+                deadline = loop.time() + CLASSIFY_BATCH_WINDOW
+                while len(batch) < CLASSIFY_BATCH_MAX:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            else:
+                while len(batch) < CLASSIFY_BATCH_MAX and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+            # Dispatch without waiting so the next batch can fill while this call is in flight.
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    @staticmethod
+    async def _dispatch(batch: List[Tuple["WorkflowProcessor", str, asyncio.Future]]) -> None:
+        # Batchers are per API key, so any processor in the batch can make the call.
+        processor = batch[0][0]
+        try:
+            results = await processor.classify_batch([query for _, query, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# event loop -> {Gemini API key: batcher}; like the pools, processors are per request but batchers aren't.
+_classify_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _ClassifyBatcher]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _classify_batcher(api_key: str) -> _ClassifyBatcher:
+    batchers = _classify_batchers.setdefault(asyncio.get_running_loop(), {})
+    if api_key not in batchers:
+        batchers[api_key] = _ClassifyBatcher()
+    return batchers[api_key]
+
+
 # Define the state for our graph
-class WorkflowState(TypedDict):
+@dataclass(slots=True)
+class WorkflowState:
     user_query: str
-    action_type: Optional[str]  # e.g., "github_create_issue", "slack_send_message"
-    repo_name: Optional[str]
-    issue_number: Optional[int]
-    comment_body: Optional[str]
-    issue_title: Optional[str]  # For creating issues
-    issue_body: Optional[str]  # For creating issues
-    api_response: Union[Dict[str, Any], None]  # To store the response from GitHub/Slack API calls
-    error_message: Optional[str]
-    branch_name: Optional[str]  # For future use, e.g., for GitHub branches
-    branch_list: Optional[Dict[str, Any]]  # For storing branch details if needed
+    action_type: Optional[str] = None  # e.g., "github_create_issue", "slack_send_message"
+    repo_name: Optional[str] = None
+    issue_number: Optional[int] = None
+    comment_body: Optional[str] = None
+    issue_title: Optional[str] = None  # For creating issues
+    issue_body: Optional[str] = None  # For creating issues
+    api_response: Union[Dict[str, Any], None] = None  # To store the response from GitHub/Slack API calls
+    error_message: Optional[str] = None
+    branch_name: Optional[str] = None  # For GitHub branch operations
+    branch_list: Optional[Dict[str, Any]] = None  # For storing branch details if needed
+    source_branch: Optional[str] = None  # For creating branches
+    needs_clarification: Optional[bool] = None
+    compound_actions: Optional[List[Dict[str, Any]]] = None  # Extra actions from the same query
+    # Results of the compound actions; parallel branches append, so the channel concatenates.
+    secondary_responses: Annotated[List[Dict[str, Any]], operator.add] = field(default_factory=list)
+    query_embedding: Optional[List[float]] = None  # Set by the classifier so later nodes needn't re-embed
 
 
 class WorkflowProcessor:
+    # Shared by every processor so repeated queries skip Gemini regardless of which request built us.
+    _classification_cache: ClassVar[ResponseCache] = ResponseCache(
+        maxsize=1024,
+        ttl=3600,
+        similarity_threshold=0.92,
+        persist_path=CLASSIFICATION_CACHE_PATH,
+        enabled=GEMINI_CACHE_ENABLED,
+    )
+    # Chat replies are also served to near-identical wording ("hi" / "hello there").
+    _general_response_cache: ClassVar[ResponseCache] = ResponseCache(
+        maxsize=1024, ttl=3600, similarity_threshold=0.92, enabled=GEMINI_CACHE_ENABLED
+    )
+
+    _compiled_app: ClassVar[Any] = None
+
+    # Conditional-GET cache for GitHub reads: (token scope, url) -> (ETag, parsed body), in LRU order.
+    _etag_cache: ClassVar["OrderedDict[tuple, tuple]"] = OrderedDict()
+    # Slack name indexes: (token scope, "channels" | "users" | "emails") -> (loaded_at, {name: id}).
+    _slack_directory: ClassVar[Dict[tuple, tuple]] = {}
+
+    # Paths are relative to each client's base_url; the GitHub ones are bound per owner in __init__.
+    _SLACK_USERS_LIST_URL = "/users.list"
+    _SLACK_USERS_LOOKUP_BY_EMAIL_URL = "/users.lookupByEmail"
+    _SLACK_CONVERSATIONS_OPEN_URL = "/conversations.open"
+    _SLACK_CONVERSATIONS_LIST_URL = "/conversations.list"
+    _SLACK_POST_MESSAGE_URL = "/chat.postMessage"
+    # kind -> (list endpoint, key holding the items, first-page query params)
+    _SLACK_DIRECTORY_SOURCES = {
+        "channels": (
+            _SLACK_CONVERSATIONS_LIST_URL,
+            "channels",
+            MappingProxyType({"types": "public_channel,private_channel", "exclude_archived": "true", "limit": 1000}),
+        ),
+        "users": (_SLACK_USERS_LIST_URL, "members", MappingProxyType({"limit": 1000})),
+    }
+
     def __init__(self, gemini_api_key: str, github_token: str, slack_token: str, github_owner: str):
         # TODO: Make GitHub owner dynamic instead of hardcoded.
         self.github_token = github_token
         self.slack_token = slack_token
         self.github_owner = github_owner
+        # The owner never changes per processor, so bake it into bound ``str.format`` path templates.
+        repo_path = f"/repos/{github_owner}/{{repo}}"
+        self._branches_url = f"{repo_path}/branches".format
+        self._branch_url = f"{repo_path}/branches/{{branch}}".format
+        self._refs_url = f"{repo_path}/git/refs".format
+        self._head_ref_url = f"{repo_path}/git/refs/heads/{{branch}}".format
+        self._issues_url = f"{repo_path}/issues".format
+        self._open_issues_url = f"{repo_path}/issues?state=open&per_page={{per_page}}".format
+        self._issue_url = f"{repo_path}/issues/{{num}}".format
+        self._comments_url = f"{repo_path}/issues/{{num}}/comments".format
+        # Keeps cached GitHub bodies private to the token that was allowed to read them.
+        self._etag_scope = hashlib.blake2b((github_token or "").encode(), digest_size=8).hexdigest()
+        self._slack_scope = hashlib.blake2b((slack_token or "").encode(), digest_size=8).hexdigest()
 
         if not gemini_api_key:
             raise ValueError("Gemini API key is required.")
-        genai.configure(api_key=gemini_api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self._gemini_api_key = gemini_api_key
+        self.model = _get_model(gemini_api_key, GEMINI_MODEL)
+
+        # One keep-alive session per service with its auth headers set once; transient 5xx are retried.
+        github_auth = {"Authorization": f"token {github_token}"}
+        slack_auth = {"Authorization": f"Bearer {slack_token}"}
+        self._github = httpx.AsyncClient(
+            base_url="https://api.github.com",
+            headers={**github_auth, "Accept": "application/vnd.github+json", "Content-Type": "application/json"},
+            transport=_service_transport("github", github_auth if github_token else None),
+            timeout=HTTP_TIMEOUT,
+        )
+        self._slack = httpx.AsyncClient(
+            base_url="https://slack.com/api",
+            headers={**slack_auth, "Content-Type": "application/json"},
+            transport=_service_transport("slack", slack_auth if slack_token else None),
+            timeout=HTTP_TIMEOUT,
+        )
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
 
-        self.app = self._build_graph()
+        # The graph holds no per-processor state, so it is compiled once and shared; each run
+        # passes its processor in the config.
+        cls = type(self)
+        if cls._compiled_app is None:
+            cls._compiled_app = cls._build_graph()
+        self.app = cls._compiled_app
+
+    async def _run_in_pool(self, *tasks: tuple) -> List[Any]:
+        """Runs independent blocking ``(fn, args)`` tasks on the pool and returns their results in order."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(_WORKER_POOL, fn, *args) for fn, args in tasks))
 
     # --- GitHub API Helper Functions ---
-    def _call_list_github_branches(self, repo_name: str) -> Dict[str, Any]:
-        """Lists all branches for a GitHub repository."""
-        if not repo_name:
-            return {"error": "Repository name not provided"}
-        url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/branches"
-        headers = {"Authorization": f"token {self.github_token}"}
-        response = requests.get(url, headers=headers)
+    async def _get_json(self, url: str) -> Any:
+        """GETs a GitHub resource as parsed JSON, revalidating any cached copy with its ETag."""
+        cached = self._cached_etag(url)
+        response = await self._github.get(url, headers=self._conditional_headers(cached))
+        if response.status_code == 304:
+            return self._cached_body(url, cached)
         if response.status_code != 200:
             return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
-        return response.json()
+        body = orjson.loads(response.content)
+        self._remember_etag(url, response, body)
+        return body
+
+    async def _post_json(self, url: str, data: Dict[str, Any]) -> Any:
+        """POSTs ``data`` to GitHub as JSON and returns the parsed reply, or an error dict."""
+        response = await self._github.post(url, content=orjson.dumps(data))
+        if response.status_code not in (200, 201):
+            logger.warning("GitHub API Error: %s - %s", response.status_code, response.text)
+            return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
+        return orjson.loads(response.content)
 
-    def _call_get_github_branch(self, repo_name: str, branch_name: str) -> Dict[str, Any]:
+    async def _call_list_github_branches(self, repo_name: str) -> Dict[str, Any]:
+        """Lists all branches for a GitHub repository."""
+        return await self._get_json(self._branches_url(repo=repo_name))
+
+    async def _call_get_github_branch(self, repo_name: str, branch_name: str) -> Dict[str, Any]:
         """Gets details for a specific GitHub branch."""
-        if not repo_name or not branch_name:
-            return {"error": "Repository name or branch name not provided"}
-        url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/branches/{branch_name}"
-        headers = {"Authorization": f"token {self.github_token}"}
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
-        return response.json()
+        return await self._get_json(self._branch_url(repo=repo_name, branch=branch_name))
 
-    def _call_create_github_branch(
+    async def _call_create_github_branch(
         self, repo_name: str, branch_name: str, source_branch: str = "main"
     ) -> Dict[str, Any]:
         """Creates a new branch from a source branch."""
-        if not repo_name or not branch_name:
-            return {"error": "Repository name or branch name not provided"}
-
         # First, get the SHA of the source branch
-        source_url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/git/refs/heads/{source_branch}"
-        headers = {"Authorization": f"token {self.github_token}"}
-        source_response = requests.get(source_url, headers=headers)
+        source_url = self._head_ref_url(repo=repo_name, branch=source_branch)
+        source_response = await self._github.get(source_url)
 
         if source_response.status_code != 200:
             return {"error": f"Could not find source branch '{source_branch}'", "details": source_response.text}
 
-        source_sha = source_response.json()["object"]["sha"]
+        source_sha = orjson.loads(source_response.content)["object"]["sha"]
 
         # Create the new branch
-        create_url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/git/refs"
         create_data = {"ref": f"refs/heads/{branch_name}", "sha": source_sha}
-        create_response = requests.post(create_url, json=create_data, headers=headers)
+        return await self._post_json(self._refs_url(repo=repo_name), create_data)
 
-        if create_response.status_code not in [200, 201]:
-            return {"error": f"GitHub API Error: {create_response.status_code}", "details": create_response.text}
-        return create_response.json()
-
-    def _call_create_github_issue(self, repo_name: str, title: str, body: str) -> Dict[str, Any]:
+    async def _call_create_github_issue(self, repo_name: str, title: str, body: str) -> Dict[str, Any]:
         """Creates a GitHub issue dynamically based on user query."""
-        if not repo_name:
-            return {"error": "Repository name not found in query"}
-        if not title:
-            return {"error": "Issue title not provided"}
-
-        url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/issues"
-        headers = {"Authorization": f"token {self.github_token}"}
-        data = {"title": title, "body": body or f"Issue created via AutoFlowBot based on user query."}
-        print(f"DEBUG: Creating GitHub issue: URL={url}, Data={data}")
-        response = requests.post(url, json=data, headers=headers)
-        if response.status_code not in [200, 201]:
-            print(f"DEBUG: GitHub API Error: {response.status_code} - {response.text}")
-            return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
-        return response.json()
+        url = self._issues_url(repo=repo_name)
+        data = {"title": title, "body": body or "Issue created via AutoFlowBot based on user query."}
+        logger.debug("Creating GitHub issue: URL=%s, Data=%s", url, data)
+        return await self._post_json(url, data)
 
     
-    def _call_send_slack_message(self, message: str, channel: str = "#general", user: str = None) -> Dict[str, Any]:
+    async def _call_send_slack_message(self, message: str, channel: str = "#general", user: str = None) -> Dict[str, Any]:
         """Sends a message to a Slack channel or user with improved channel resolution."""
         
         # DEBUG: Print what we're receiving
-        print(f"DEBUG - Message: '{message}'")
-        print(f"DEBUG - Channel: '{channel}'")
-        print(f"DEBUG - User: '{user}'")
-        
-        headers = {
-            "Authorization": f"Bearer {self.slack_token}",
-            "Content-Type": "application/json"
-        }
+        logger.debug("Message: '%s'", message)
+        logger.debug("Channel: '%s'", channel)
+        logger.debug("User: '%s'", user)
         
         try:
-            with httpx.Client(timeout=10.0) as client:
-                if user:
-                    # Send DM to user
-                    users_response = client.get("https://slack.com/api/users.list", headers=headers)
-                    
-                    if users_response.status_code != 200:
-                        return {"ok": False, "error": f"HTTP error {users_response.status_code} when listing users"}
-                    
-                    users_data = users_response.json()
-                    
-                    if not users_data.get("ok"):
-                        error_msg = users_data.get("error", "Unknown error")
-                        if error_msg == "invalid_auth":
-                            return {"ok": False, "error": "Invalid Slack token"}
-                        return {"ok": False, "error": f"Could not list users: {error_msg}"}
-                    
-                    # Find user ID
-                    user_id = None
-                    for member in users_data.get("members", []):
-                        if (member.get("name") == user or 
-                            member.get("profile", {}).get("display_name") == user or
-                            member.get("real_name") == user):
-                            user_id = member.get("id")
-                            break
-                    
-                    if not user_id:
-                        return {"ok": False, "error": f"User '{user}' not found"}
-                    
-                    # Open DM conversation
-                    dm_response = client.post(
-                        "https://slack.com/api/conversations.open",
-                        json={"users": user_id},
-                        headers=headers
-                    )
-                    
-                    if dm_response.status_code != 200:
-                        return {"ok": False, "error": f"HTTP error {dm_response.status_code} when opening DM"}
-                    
-                    dm_result = dm_response.json()
-                    
-                    if not dm_result.get("ok"):
-                        error_msg = dm_result.get("error", "Unknown error")
-                        return {"ok": False, "error": f"Could not open DM: {error_msg}"}
-                    
-                    channel_id = dm_result.get("channel", {}).get("id")
-                    
-                else:
-                    # Send to channel - get channel ID
-                    channel_name = channel.lstrip("#")
-                    print(f"DEBUG - Processed channel name: '{channel_name}'")
-                    
-                    # IMPROVED: Try multiple conversation types in one call
-                    channels_response = client.get(
-                        "https://slack.com/api/conversations.list",
-                        headers=headers,
-                        params={
-                            "types": "public_channel,private_channel",  # Get both public and private
-                            "exclude_archived": "true",
-                            "limit": 1000  # Increase limit to get more channels
-                        }
-                    )
-                    
-                    if channels_response.status_code != 200:
-                        return {"ok": False, "error": f"HTTP error {channels_response.status_code} when listing channels"}
-                    
-                    channels_data = channels_response.json()
-                    
-                    if not channels_data.get("ok"):
-                        error_msg = channels_data.get("error", "Unknown error")
-                        if error_msg == "invalid_auth":
-                            return {"ok": False, "error": "Invalid Slack token"}
-                        return {"ok": False, "error": f"Could not list channels: {error_msg}"}
-                    
-                    # Find channel ID
-                    channel_id = None
-                    for ch in channels_data.get("channels", []):
-                        if ch.get("name") == channel_name:
-                            channel_id = ch.get("id")
-                            print(f"DEBUG - Found channel '{channel_name}' with ID: {channel_id}")
-                            break
-                    
-                    # If still not found, try to check if it's a direct channel ID
-                    if not channel_id:
-                        # Check if the channel name is actually a channel ID (starts with C)
-                        if channel_name.startswith('C') and len(channel_name) >= 9:
-                            channel_id = channel_name
-                            print(f"DEBUG - Using channel name as ID: {channel_id}")
-                        else:
-                            # List available channels for debugging
-                            available_channels = [ch.get("name") for ch in channels_data.get("channels", [])]
-                            print(f"DEBUG - Available channels: {available_channels[:10]}")  # Show first 10
-                            return {
-                                "ok": False, 
-                                "error": f"Channel '{channel_name}' not found. Available channels (first 10): {', '.join(available_channels[:10])}"
-                            }
+            if user:
+                # Send DM to user
+                user_id, error = await self._slack_user_id(user)
+                if error:
+                    return {"ok": False, "error": error}
                 
-                # Send message
-                print(f"DEBUG - Final channel_id: '{channel_id}'")
-                print(f"DEBUG - Final message: '{message}'")
+                if not user_id:
+                    return {"ok": False, "error": f"User '{user}' not found"}
                 
-                message_data = {
-                    "channel": channel_id,
-                    "text": message
-                }
-                
-                message_response = client.post(
-                    "https://slack.com/api/chat.postMessage",
-                    json=message_data,
-                    headers=headers
+                # Open DM conversation
+                dm_response = await self._slack.post(
+                    self._SLACK_CONVERSATIONS_OPEN_URL, content=orjson.dumps({"users": user_id})
                 )
                 
-                if message_response.status_code != 200:
-                    return {"ok": False, "error": f"HTTP error {message_response.status_code} when sending message"}
+                if dm_response.status_code != 200:
+                    return {"ok": False, "error": f"HTTP error {dm_response.status_code} when opening DM"}
                 
-                result = message_response.json()
+                dm_result = orjson.loads(dm_response.content)
                 
-                if not result.get("ok"):
-                    error_msg = result.get("error", "Unknown error")
-                    if error_msg == "invalid_auth":
-                        return {"ok": False, "error": "Invalid Slack token"}
-                    elif error_msg == "channel_not_found":
-                        return {"ok": False, "error": f"Channel not found or bot not added to channel"}
-                    elif error_msg == "not_in_channel":
-                        return {"ok": False, "error": f"Bot is not a member of the channel"}
-                    elif error_msg == "channel_not_found":
-                        return {"ok": False, "error": f"Channel ID '{channel_id}' not found"}
-                    return {"ok": False, "error": f"Could not send message: {error_msg}"}
+                if not dm_result.get("ok"):
+                    error_msg = dm_result.get("error", "Unknown error")
+                    return {"ok": False, "error": f"Could not open DM: {error_msg}"}
                 
-                return result
+                channel_id = dm_result.get("channel", {}).get("id")
+                
+            else:
+                # Send to channel - get channel ID
+                channel_name = channel.lstrip("#")
+                logger.debug("Processed channel name: '%s'", channel_name)
                 
+                channel_id, error = await self._slack_lookup("channels", channel_name)
+                if error:
+                    return {"ok": False, "error": error}
+                if channel_id:
+                    logger.debug("Found channel '%s' with ID: %s", channel_name, channel_id)
+                
+                # If still not found, try to check if it's a direct channel ID
+                if not channel_id:
+                    # Check if the channel name is actually a channel ID (starts with C)
+                    if channel_name.startswith('C') and len(channel_name) >= 9:
+                        channel_id = channel_name
+                        logger.debug("Using channel name as ID: %s", channel_id)
+                    else:
+                        # List available channels for debugging
+                        available_channels = list(self._slack_directory[(self._slack_scope, "channels")][1])
+                        logger.debug("Available channels: %s", available_channels[:10])  # Show first 10
+                        return {
+                            "ok": False, 
+                            "error": f"Channel '{channel_name}' not found. Available channels (first 10): {', '.join(available_channels[:10])}"
+                        }
+            
+            # Send message
+            logger.debug("Final channel_id: '%s'", channel_id)
+            logger.debug("Final message: '%s'", message)
+            
+            message_data = {
+                "channel": channel_id,
+                "text": message
+            }
+            
+            message_response = await self._slack.post(
+                self._SLACK_POST_MESSAGE_URL, content=orjson.dumps(message_data)
+            )
+            
+            if message_response.status_code != 200:
+                return {"ok": False, "error": f"HTTP error {message_response.status_code} when sending message"}
+            
+            result = orjson.loads(message_response.content)
+            
+            if not result.get("ok"):
+                error_msg = result.get("error", "Unknown error")
+                if error_msg == "invalid_auth":
+                    return {"ok": False, "error": "Invalid Slack token"}
+                elif error_msg == "channel_not_found":
+                    # The cached id may be stale (channel renamed or deleted); forget just this name.
+                    if not user:
+                        self._slack_directory[(self._slack_scope, "channels")][1].pop(channel.lstrip("#"), None)
+                    return {"ok": False, "error": f"Channel not found or bot not added to channel"}
+                elif error_msg == "not_in_channel":
+                    return {"ok": False, "error": f"Bot is not a member of the channel"}
+                elif error_msg == "channel_not_found":
+                    return {"ok": False, "error": f"Channel ID '{channel_id}' not found"}
+                return {"ok": False, "error": f"Could not send message: {error_msg}"}
+            
+            return result
+            
         except httpx.TimeoutException:
             return {"ok": False, "error": "Slack API timeout"}
         except httpx.RequestError as e:
@@ -257,109 +1059,250 @@ class WorkflowProcessor:
             return {"ok": False, "error": f"Unexpected error: {str(e)}"}
     
 
-    def _call_list_github_issues(self, repo_name: str) -> Dict[str, Any]:
-        """Lists issues for a given GitHub repository."""
-        if not repo_name:
-            return {"error": "Repository name not provided"}
-        url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/issues"
-        headers = {"Authorization": f"token {self.github_token}"}
-        response = requests.get(url, headers=headers)
+    async def _slack_lookup(self, kind: str, name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Resolves a channel or user name to its Slack id as ``(id, error)``, reloading the index on a miss."""
+        key = (self._slack_scope, kind)
+        entry = self._slack_directory.get(key)
+        if entry and name in entry[1] and time.monotonic() - entry[0] < SLACK_DIRECTORY_TTL:
+            return entry[1][name], None
+        async with _slack_reload_lock(key):
+            # Another coroutine may have reloaded the index while we waited for the lock.
+            current = self._slack_directory.get(key)
+            if current is entry:
+                directory, error = await self._load_slack_directory(kind)
+                if error:
+                    return None, error
+                current = self._slack_directory[key] = (time.monotonic(), directory)
+        return current[1].get(name), None
+
+    async def _slack_user_id(self, user: str) -> Tuple[Optional[str], Optional[str]]:
+        """Resolves a user name or email to its Slack id; emails skip the full member list."""
+        if not _EMAIL_RE.fullmatch(user):
+            return await self._slack_lookup("users", user)
+        key = (self._slack_scope, "emails")
+        entry = self._slack_directory.get(key)
+        if entry is None or time.monotonic() - entry[0] >= SLACK_DIRECTORY_TTL:
+            entry = self._slack_directory[key] = (time.monotonic(), {})
+        if user in entry[1]:
+            return entry[1][user], None
+
+        response = await self._slack.get(self._SLACK_USERS_LOOKUP_BY_EMAIL_URL, params={"email": user})
         if response.status_code != 200:
-            return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
-        return response.json()
-
-    def _call_get_github_issue(self, repo_name: str, issue_number: int) -> Dict[str, Any]:
+            return None, f"HTTP error {response.status_code} when looking up user"
+        data = orjson.loads(response.content)
+        if not data.get("ok"):
+            error_msg = data.get("error", "Unknown error")
+            if error_msg == "users_not_found":
+                return None, None
+            if error_msg == "invalid_auth":
+                return None, "Invalid Slack token"
+            return None, f"Could not look up user: {error_msg}"
+        user_id = entry[1][user] = data["user"]["id"]
+        return user_id, None
+
+    async def _load_slack_directory(self, kind: str) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+        """Pages through conversations.list or users.list and maps every name to its id."""
+        url, items_key, params = self._SLACK_DIRECTORY_SOURCES[kind]
+        directory: Dict[str, str] = {}
+        while True:
+            response = await self._slack.get(url, params=params)
+            if response.status_code != 200:
+                return None, f"HTTP error {response.status_code} when listing {kind}"
+            data = orjson.loads(response.content)
+            if not data.get("ok"):
+                error_msg = data.get("error", "Unknown error")
+                if error_msg == "invalid_auth":
+                    return None, "Invalid Slack token"
+                return None, f"Could not list {kind}: {error_msg}"
+            for item in data.get(items_key, []):
+                names = [item.get("name")]
+                if kind == "users":
+                    names += [item.get("profile", {}).get("display_name"), item.get("real_name")]
+                for item_name in names:
+                    if item_name:
+                        directory.setdefault(item_name, item.get("id"))
+            cursor = data.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                return directory, None
+            params = {**params, "cursor": cursor}
+
+    def _cached_etag(self, url: str) -> Optional[tuple]:
+        """The ``(ETag, body)`` cached for ``url``, if any.
+
+        Callers keep the entry for the whole request: the LRU is shared and may evict it before the 304 arrives.
+        """
+        return self._etag_cache.get((self._etag_scope, url))
+
+    @staticmethod
+    def _conditional_headers(cached: Optional[tuple]) -> Dict[str, str]:
+        """Returns an If-None-Match header for a cached ``(ETag, body)`` entry."""
+        return {"If-None-Match": cached[0]} if cached else {}
+
+    def _cached_body(self, url: str, cached: tuple) -> Any:
+        """Returns the body of the entry sent as If-None-Match after GitHub answered 304 Not Modified."""
+        key = (self._etag_scope, url)
+        if key in self._etag_cache:
+            self._etag_cache.move_to_end(key)
+        return cached[1]
+
+    def _remember_etag(self, url: str, response: httpx.Response, body: Any) -> None:
+        etag = response.headers.get("ETag")
+        if not etag:
+            return
+        key = (self._etag_scope, url)
+        self._etag_cache[key] = (etag, body)
+        self._etag_cache.move_to_end(key)
+        while len(self._etag_cache) > ETAG_CACHE_SIZE:
+            self._etag_cache.popitem(last=False)
+
+    async def _call_list_github_issues(self, repo_name: str, limit: int = ISSUES_PER_PAGE) -> Dict[str, Any]:
+        """Lists open issues for a given GitHub repository, keeping only their number and title."""
+        url = self._open_issues_url(repo=repo_name, per_page=limit)
+        cached = self._cached_etag(url)
+        async with self._github.stream("GET", url, headers=self._conditional_headers(cached)) as response:
+            if response.status_code == 304:
+                return self._cached_body(url, cached)
+            if response.status_code != 200:
+                await response.aread()
+                return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
+
+            # Parse the page incrementally and drop everything but the fields we render.
+            issues = []
+            parsed = ijson.sendable_list()
+            parser = ijson.items_coro(parsed, "item")
+            async for chunk in response.aiter_bytes():
+                parser.send(chunk)
+                issues.extend({"number": issue["number"], "title": issue["title"]} for issue in parsed)
+                del parsed[:]
+            parser.close()
+            issues.extend({"number": issue["number"], "title": issue["title"]} for issue in parsed)
+        result = {"issues": issues, "total_count": len(issues)}
+        last_page = _last_page(response.links)
+        if last_page is not None:
+            # Every page before the last is full and the last holds at least one issue; the reply
+            # says "at least" rather than spend a second request on the exact count.
+            result["total_count"] = limit * (last_page - 1) + 1
+            result["total_is_lower_bound"] = True
+        self._remember_etag(url, response, result)
+        return result
+
+    async def _call_get_github_issue(self, repo_name: str, issue_number: int) -> Dict[str, Any]:
         """Gets details for a specific GitHub issue."""
-        if not repo_name or not issue_number:
-            return {"error": "Repository name or issue number not provided"}
-        url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/issues/{issue_number}"
-        headers = {"Authorization": f"token {self.github_token}"}
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
-        return response.json()
+        return await self._get_json(self._issue_url(repo=repo_name, num=issue_number))
 
-    def _call_comment_on_github_issue(self, repo_name: str, issue_number: int, comment_body: str) -> Dict[str, Any]:
+    async def _call_comment_on_github_issue(self, repo_name: str, issue_number: int, comment_body: str) -> Dict[str, Any]:
         """Adds a comment to a specific GitHub issue."""
-        if not repo_name or not issue_number or not comment_body:
-            return {"error": "Repository name, issue number, or comment body not provided"}
-        url = f"https://api.github.com/repos/{self.github_owner}/{repo_name}/issues/{issue_number}/comments"
-        headers = {"Authorization": f"token {self.github_token}"}
-        data = {"body": comment_body}
-        response = requests.post(url, json=data, headers=headers)
-        if response.status_code not in [200, 201]:
-            return {"error": f"GitHub API Error: {response.status_code}", "details": response.text}
-        return response.json()
+        return await self._post_json(self._comments_url(repo=repo_name, num=issue_number), {"body": comment_body})
 
     # --- LangGraph Node Functions ---
-    def _classify_and_extract_parameters_node(self, state: WorkflowState) -> Dict[str, Any]:
+    async def _classify_and_extract_parameters_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Uses Gemini API to classify the query and extract parameters with improved NLP."""
-        print("--- Classifying Query and Extracting Parameters ---")
-        user_query = state["user_query"]
-
-        # Enhanced prompt with better natural language understanding
-        prompt = f"""
-        You are DevCascade, a smart assistant that understands user requests for DevOps automation.
-
-        User said: "{user_query}"
-
-IMPORTANT: When users want to create an issue, they might describe:
-1. The PROBLEM/BUG they want to report (extract this as the issue content)
-2. WHERE to create it (repository name)
+        logger.debug("--- Classifying Query and Extracting Parameters ---")
+        user_query = state.user_query
 
-Examples:
-- "raise an issue in repo gc-adi about login bug" → Issue about login bug in gc-adi repo
-- "create issue in backend: API is returning 500 errors" → Issue about API errors in backend repo
-- "report bug in frontend that buttons don't work" → Issue about button bug in frontend repo
-
-BRANCH OPERATIONS:
-- "list branches in repo X" → List all branches in repository X
-- "show branch feature-login in repo X" → Get details for specific branch
-- "create branch hotfix-123 from main in repo X" → Create new branch from source
-- "what branches exist in repo X" → List all branches
+        fast_path = _fast_classify(user_query)
+        if fast_path is not None:
+            return fast_path
 
-For CREATE ISSUE requests, identify:
-- WHAT is the actual problem/issue to report (not the command itself)
-- WHERE to create it (repository)
+        cache_key = ResponseCache.key_for(user_query, namespace=f"classify:{GEMINI_MODEL}")
+        cached = self._classification_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
 
-If the user just says "raise an issue in repo X" without specifying WHAT issue, ask them what problem they want to report.
-
-Respond in this exact format:
-ACTION: [github_create_issue, github_list_issues, github_get_issue, github_comment_issue, github_list_branches, github_get_branch, github_create_branch, slack_send_message, general_response, unhandled]
-REPO: [repository name or null]
-ISSUE_NUMBER: [issue number or null]
-ISSUE_TITLE: [short title describing the actual problem, not the command]
-ISSUE_BODY: [detailed description of the problem, not the user's command]
-COMMENT: [comment text if adding comment, or null]
-MESSAGE: [message text for slack, or null]
-BRANCH_NAME: [branch name for branch operations, or null]
-SOURCE_BRANCH: [source branch for creating new branch, or null]
-CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
-"""
+        # Extract parameters locally in the background; they back-fill anything Gemini leaves null.
+        fallback_future = asyncio.ensure_future(
+            self._run_in_pool((self._extract_all, (user_query,)))
+        )
+        # Embedding and classification run together; a semantic hit cancels the classification.
+        classification = asyncio.ensure_future(self._classify_batched(user_query))
+        embedding = await embed_text(user_query)
+        if embedding is not None:
+            cached = self._classification_cache.get_similar(embedding)
+            if cached is not None:
+                fallback_future.cancel()
+                classification.cancel()
+                return {**cached, "query_embedding": embedding}
 
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            print(f"Gemini Classification Response: {response_text}")
-
-            # Parse the structured response
-            parsed_data = self._parse_structured_response(response_text)
+            parsed_data = await classification
 
             # Add some fallback logic for common cases
             if parsed_data["action_type"] == "unhandled":
-                parsed_data = self._fallback_classification(user_query)
+                fallback_future.cancel()
+                return self._fallback_classification(user_query)
+
+            # Gemini's JSON already carries every parameter; the regex results only matter for a
+            # field the action needs that it left null.
+            required = _REQUIRED_PARAMS.get(parsed_data["action_type"], ())
+            backfill = [
+                name for name in ("repo_name", "issue_number") if name in required and parsed_data[name] is None
+            ]
+            if backfill:
+                (extracted,) = await fallback_future
+                for name in backfill:
+                    parsed_data[name] = extracted[name]
+            else:
+                fallback_future.cancel()
 
-            return parsed_data
+            # Only parameter-free results may be reused for merely similar wording; anything carrying
+            # a repo, issue number or text must match the query exactly.
+            parameter_free = (
+                parsed_data["action_type"] in SEMANTIC_CACHE_ACTIONS and not parsed_data.get("compound_actions")
+            )
+            semantic_key = embedding if parameter_free else None
+            self._classification_cache.set(cache_key, parsed_data, embedding=semantic_key)
+            return {**parsed_data, "query_embedding": embedding}
 
         except Exception as e:
-            print(f"Error during classification/extraction: {e}")
+            logger.warning("Error during classification/extraction: %s", e)
             # Fallback to simple pattern matching
             return self._fallback_classification(user_query)
 
+    async def classify_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Classifies several queries with one Gemini call; a single query takes the streaming path.
+
+        Queries that normalize to the same text are sent once and share the result.
+        """
+        # normalized text -> first spelling seen, which is what Gemini gets (repo names are case-sensitive)
+        unique: Dict[str, str] = {}
+        for query in queries:
+            unique.setdefault(query.strip().lower(), query)
+        if len(unique) == 1:
+            result = await self._classify_one(queries[0])
+            return [result] + [dict(result) for _ in queries[1:]]
+
+        numbered = "\n".join(f"{i}. {query}" for i, query in enumerate(unique.values(), 1))
+        prompt = _CLASSIFY_PROMPT_PREFIX + _CLASSIFY_BATCH_INSTRUCTIONS + numbered
+        max_output_tokens = min(
+            CLASSIFIER_GENERATION_CONFIG["max_output_tokens"] * len(unique), MODEL_MAX_OUTPUT_TOKENS
+        )
+        response = await _get_batch_classifier(self._gemini_api_key, GEMINI_MODEL).generate_content_async(
+            prompt, generation_config={"max_output_tokens": max_output_tokens}
+        )
+        logger.debug("Gemini Batch Classification Response: %s", response.text)
+        results = _loads_model_json(response.text)
+        if not isinstance(results, list) or len(results) != len(unique):
+            raise ValueError(f"Gemini returned a malformed batch classification for {len(unique)} queries")
+        by_query = dict(zip(unique, results))
+        return [self._normalize_classification(by_query[query.strip().lower()]) for query in queries]
+
+    async def _classify_one(self, user_query: str) -> Dict[str, Any]:
+        prompt = _CLASSIFY_PROMPT_TEMPLATE.format(user_query=user_query)
+        stream = await _get_classifier(self._gemini_api_key, GEMINI_MODEL).generate_content_async(prompt, stream=True)
+        response_text = await _read_json_object(stream, early_exit=_EARLY_EXIT_ACTIONS)
+        logger.debug("Gemini Classification Response: %s", response_text)
+
+        # JSON mode guarantees a schema-shaped object, so no fence stripping or line parsing is needed.
+        return self._normalize_classification(_loads_model_json(response_text))
+
+    async def _classify_batched(self, user_query: str) -> Dict[str, Any]:
+        """Classifies the query through the loop's shared batcher for this API key."""
+        return await _classify_batcher(self._gemini_api_key).classify(self, user_query)
+
     def _needs_clarification_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Handle cases where user intent needs clarification"""
-        print("--- Requesting Clarification ---")
-        repo_name = state.get("repo_name", "the repository")
+        logger.debug("--- Requesting Clarification ---")
+        repo_name = state.repo_name or "the repository"
 
         return {
             "api_response": {
@@ -369,10 +1312,20 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
             }
         }
 
-    def _general_response_node(self, state: WorkflowState) -> Dict[str, Any]:
+    async def _general_response_node(self, state: WorkflowState) -> Dict[str, Any]:
         """Handle general conversation using Gemini"""
-        print("--- Executing General Response Node ---")
-        user_query = state["user_query"]
+        logger.debug("--- Executing General Response Node ---")
+        user_query = state.user_query
+
+        cache_key = ResponseCache.key_for(user_query, namespace=f"general:{GEMINI_MODEL}")
+        cached = self._general_response_cache.get(cache_key)
+        if cached is not None:
+            return {"api_response": cached}
+        embedding = state.query_embedding or await embed_text(user_query)
+        if embedding is not None:
+            cached = self._general_response_cache.get_similar(embedding)
+            if cached is not None:
+                return {"api_response": cached}
 
         prompt = f"""
         You are DevCascade, a friendly DevOps assistant. The user said: "{user_query}"
@@ -384,8 +1337,10 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
         """
 
         try:
-            response = self.model.generate_content(prompt)
-            return {"api_response": {"message": response.text.strip(), "type": "general_conversation"}}
+            response = await self.model.generate_content_async(prompt)
+            api_response = {"message": response.text.strip(), "type": "general_conversation"}
+            self._general_response_cache.set(cache_key, api_response, embedding=embedding)
+            return {"api_response": api_response}
         except Exception as e:
             return {
                 "api_response": {
@@ -394,73 +1349,38 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 }
             }
 
-    def _parse_structured_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse the structured response from Gemini"""
-        lines = response_text.split("\n")
-        parsed = {
-            "action_type": "unhandled",
-            "repo_name": None,
-            "issue_number": None,
-            "comment_body": None,
-            "issue_title": None,
-            "issue_body": None,
-            "error_message": None,
-            "needs_clarification": False,
-        }
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith("ACTION:"):
-                action = line.split(":", 1)[1].strip()
-                parsed["action_type"] = action
-            elif line.startswith("REPO:"):
-                repo = line.split(":", 1)[1].strip()
-                parsed["repo_name"] = repo if repo.lower() != "null" else None
-            elif line.startswith("ISSUE_NUMBER:"):
-                issue_num = line.split(":", 1)[1].strip()
-                if issue_num.lower() != "null":
-                    try:
-                        parsed["issue_number"] = int(issue_num)
-                    except ValueError:
-                        pass
-            elif line.startswith("ISSUE_TITLE:"):
-                title = line.split(":", 1)[1].strip()
-                parsed["issue_title"] = title if title.lower() != "null" else None
-            elif line.startswith("ISSUE_BODY:"):
-                body = line.split(":", 1)[1].strip()
-                parsed["issue_body"] = body if body.lower() != "null" else None
-            elif line.startswith("BRANCH_NAME:"):
-                branch = line.split(":", 1)[1].strip()
-                parsed["branch_name"] = branch if branch.lower() != "null" else None
-            elif line.startswith("SOURCE_BRANCH:"):
-                source = line.split(":", 1)[1].strip()
-                parsed["source_branch"] = source if source.lower() != "null" else None
-
-            elif line.startswith("COMMENT:"):
-                comment = line.split(":", 1)[1].strip()
-                parsed["comment_body"] = comment if comment.lower() != "null" else None
-
+    def _normalize_classification(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map Gemini's JSON classification onto state fields, coercing stray "null" strings and numbers"""
+        parsed = {"action_type": data.get("action_type") or "unhandled", "error_message": None}
+        for field in CLASSIFICATION_FIELDS:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip().lower() in ("", "null"):
+                value = None
+            parsed[field] = value
+
+        if parsed["issue_number"] is not None:
+            try:
+                parsed["issue_number"] = int(parsed["issue_number"])
+            except (TypeError, ValueError):
+                parsed["issue_number"] = None
+        parsed["needs_clarification"] = bool(parsed["needs_clarification"])
+
+        compound = data.get("compound_actions")
+        if compound:
+            parsed["compound_actions"] = [
+                {"action_type": action["action_type"], **{name: action[name] for name in CLASSIFICATION_FIELDS}}
+                for action in map(self._normalize_classification, compound)
+                if action["action_type"] in COMPOUND_ACTION_TYPES
+            ] or None
         return parsed
 
     def _fallback_classification(self, user_query: str) -> Dict[str, Any]:
         """Fallback classification using simple pattern matching"""
         query_lower = user_query.lower().strip()
-
-        # Check for conversational/greeting patterns first
-        greeting_patterns = [
-            "hello",
-            "hi",
-            "hey",
-            "howdy",
-            "greetings",
-            "good morning",
-            "good afternoon",
-            "good evening",
-        ]
-        question_patterns = ["how are you", "what can you do", "help", "what is", "tell me about", "explain"]
+        categories = _keyword_categories(query_lower)
 
         # Check if it's a greeting or general conversation
-        if any(greeting in query_lower for greeting in greeting_patterns):
+        if "greeting" in categories:
             return {
                 "action_type": "general_response",
                 "repo_name": None,
@@ -472,7 +1392,7 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
             }
 
         # Check if it's a general question
-        if any(question in query_lower for question in question_patterns):
+        if "question" in categories:
             return {
                 "action_type": "general_response",
                 "repo_name": None,
@@ -482,18 +1402,10 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 "issue_body": None,
                 "error_message": None,
             }
-        create_patterns = ["create", "raise", "open", "make", "new", "add"]
-        issue_patterns = ["issue", "bug", "ticket", "problem", "feature"]
-        list_patterns = ["list", "show", "see", "view", "display", "get all", "what are"]
-        slack_patterns = ["send", "message", "notify", "tell", "slack", "inform"]
-        branch_patterns = ["branch", "branches"]
-        list_branch_patterns = ["list", "show", "see", "view", "display", "get all", "what"]
-        create_branch_patterns = ["create", "make", "new", "add"]
-        repo_name = self._extract_repo_name(user_query)
-        issue_number = self._extract_issue_number(user_query)
-        if any(create in query_lower for create in create_patterns) and any(
-            issue in query_lower for issue in issue_patterns
-        ):
+        extracted = self._extract_all(user_query)
+        repo_name = extracted["repo_name"]
+        issue_number = extracted["issue_number"]
+        if "create" in categories and "issue" in categories:
             # Try to extract the actual issue content
             issue_content = self._extract_issue_content(user_query)
 
@@ -520,9 +1432,7 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 "issue_body": issue_content["body"],
                 "error_message": None,
             }
-        elif any(list_word in query_lower for list_word in list_patterns) and any(
-            issue in query_lower for issue in issue_patterns
-        ):
+        elif "list" in categories and "issue" in categories:
             return {
                 "action_type": "github_list_issues",
                 "repo_name": repo_name,
@@ -532,7 +1442,7 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 "issue_body": None,
                 "error_message": None,
             }
-        elif issue_number and ("show" in query_lower or "get" in query_lower or "details" in query_lower):
+        elif issue_number and "get" in categories:
             return {
                 "action_type": "github_get_issue",
                 "repo_name": repo_name,
@@ -542,7 +1452,7 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 "issue_body": None,
                 "error_message": None,
             }
-        elif issue_number and ("comment" in query_lower or "reply" in query_lower):
+        elif issue_number and "comment" in categories:
             return {
                 "action_type": "github_comment_issue",
                 "repo_name": repo_name,
@@ -552,7 +1462,7 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 "issue_body": None,
                 "error_message": None,
             }
-        elif any(slack in query_lower for slack in slack_patterns):
+        elif "slack" in categories:
             return {
                 "action_type": "slack_send_message",
                 "repo_name": None,
@@ -562,11 +1472,11 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                 "issue_body": None,
                 "error_message": None,
             }
-        elif any(branch in query_lower for branch in branch_patterns):
-            branch_name = self._extract_branch_name(user_query)
+        elif "branch" in categories:
+            branch_name = extracted["branch_name"]
 
-            if any(create in query_lower for create in create_branch_patterns):
-                source_branch = self._extract_source_branch(user_query)
+            if "create_branch" in categories:
+                source_branch = extracted["source_branch"]
                 return {
                     "action_type": "github_create_branch",
                     "repo_name": repo_name,
@@ -578,7 +1488,7 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
                     "issue_body": None,
                     "error_message": None,
                 }
-            elif any(list_word in query_lower for list_word in list_branch_patterns):
+            elif "list_branch" in categories:
                 return {
                     "action_type": "github_list_branches",
                     "repo_name": repo_name,
@@ -615,16 +1525,8 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
 
     def _extract_issue_content(self, query: str) -> Dict[str, str]:
         """Extract actual issue content from user query"""
-        # Patterns to identify issue content
-        content_patterns = [
-            r"about\s+(.+?)(?:\s+in\s+|\s*$)",  # "about login bug"
-            r":\s*(.+?)(?:\s+in\s+|\s*$)",  # ": API is broken"
-            r"that\s+(.+?)(?:\s+in\s+|\s*$)",  # "that buttons don't work"
-            r"with\s+(.+?)(?:\s+in\s+|\s*$)",  # "with connection issues"
-        ]
-
-        for pattern in content_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+        for pattern in _CONTENT_PATTERNS:
+            match = pattern.search(query)
             if match:
                 content = match.group(1).strip()
                 # Create title and body from extracted content
@@ -634,140 +1536,79 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
 
         return None  # No content found
 
-    def _extract_repo_name(self, query: str) -> str:
-        """Extract repository name from query using patterns"""
-        import re
-
-        # Pattern 1: "repo xyz", "repository abc", "project def"
-        patterns = [
-            r"(?:repo|repository|project)\s+([a-zA-Z0-9_-]+)",
-            r"(?:in|to|for)\s+(?:the\s+)?([a-zA-Z0-9_-]+)(?:\s+repo|\s+repository|\s+project)?",
-            r"([a-zA-Z0-9_-]+)(?:\s+repo|\s+repository|\s+project)",
-        ]
+    def _extract_all(self, query: str) -> Dict[str, Any]:
+        """Extracts repo, issue number, branch and source branch together.
 
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return match.group(1)
+        The preferred pattern of every field is matched in one pass; only fields it misses fall back
+        to their other patterns. The single-field ``_extract_*`` methods read from this result.
+        """
+        extracted = {}
+        for match in _EXTRACT_RE.finditer(query):
+            extracted.setdefault(match.lastgroup, match.group(match.lastgroup))
+        # casefold rather than lower: IGNORECASE also matches the long s and Kelvin sign.
+        query_folded = query.casefold()
+        for field, (anchors, patterns) in _EXTRACT_FALLBACKS.items():
+            if field in extracted:
+                continue
+            if not any(anchor in query_folded for anchor in anchors):
+                extracted[field] = None
+                continue
+            match = None
+            for pattern in patterns:
+                match = pattern.search(query)
+                if match:
+                    break
+            extracted[field] = match.group(1) if match else None
+        if extracted["issue_number"] is not None:
+            extracted["issue_number"] = int(extracted["issue_number"])
+        return extracted
 
-        return None
+    def _extract_repo_name(self, query: str) -> Optional[str]:
+        """Extract repository name from query using patterns"""
+        return self._extract_all(query)["repo_name"]
 
-    def _extract_issue_number(self, query: str) -> int:
+    def _extract_issue_number(self, query: str) -> Optional[int]:
         """Extract issue number from query"""
-        import re
+        return self._extract_all(query)["issue_number"]
 
-        # Pattern for issue numbers: "issue 123", "#45", "bug 67"
-        patterns = [
-            r"(?:issue|bug|ticket)\s+#?(\d+)",
-            r"#(\d+)",
-            r"(?:number|num)\s+(\d+)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except ValueError:
-                    continue
-
-        return None
-
-    def _extract_branch_name(self, query: str) -> str:
+    def _extract_branch_name(self, query: str) -> Optional[str]:
         """Extract branch name from query using patterns"""
-        import re
-
-        patterns = [
-            r"branch\s+([a-zA-Z0-9_/-]+)",
-            r"on\s+([a-zA-Z0-9_/-]+)\s+branch",
-            r"switch\s+to\s+([a-zA-Z0-9_/-]+)",
-            r"checkout\s+([a-zA-Z0-9_/-]+)",
-        ]
+        return self._extract_all(query)["branch_name"]
 
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        return None
-
-    def _extract_source_branch(self, query: str) -> str:
+    def _extract_source_branch(self, query: str) -> Optional[str]:
         """Extract source branch name from query"""
-        import re
-
-        patterns = [
-            r"from\s+([a-zA-Z0-9_/-]+)",
-            r"based\s+on\s+([a-zA-Z0-9_/-]+)",
-            r"off\s+([a-zA-Z0-9_/-]+)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        return None
-
+        return self._extract_all(query)["source_branch"]
 
-    # ...pattern matching logic
-    def _create_issue_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub Create Issue Node ---")
-        repo_name = state.get("repo_name")
-        title = state.get("issue_title") or f"Issue from query: {state['user_query'][:50]}..."
-        body = state.get("issue_body") or f"Details based on user query: {state['user_query']}"
-
-        if not repo_name:
-            return {
-                "api_response": {"error": "Repository name not extracted for creating issue."},
-                "error_message": "Repo name missing",
-            }
+    async def _create_issue_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub Create Issue Node ---")
+        title = state.issue_title or f"Issue from query: {state.user_query[:50]}..."
+        body = state.issue_body or f"Details based on user query: {state.user_query}"
 
-        response = self._call_create_github_issue(repo_name, title, body)
-        print(f"GitHub API Response: {response}")
+        response = await self._call_create_github_issue(state.repo_name, title, body)
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _list_issues_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub List Issues Node ---")
-        repo_name = state.get("repo_name")
-        if not repo_name:
-            return {
-                "api_response": {"error": "Repository name not extracted for listing issues."},
-                "error_message": "Repo name missing",
-            }
-        response = self._call_list_github_issues(repo_name)
-        print(f"GitHub API Response: {response}")
+    async def _list_issues_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub List Issues Node ---")
+        response = await self._call_list_github_issues(state.repo_name)
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _get_issue_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub Get Issue Node ---")
-        repo_name = state.get("repo_name")
-        issue_number = state.get("issue_number")
-        if not repo_name or not issue_number:
-            return {
-                "api_response": {"error": "Repo name or issue number not extracted."},
-                "error_message": "Repo/Issue num missing",
-            }
-        response = self._call_get_github_issue(repo_name, issue_number)
-        print(f"GitHub API Response: {response}")
+    async def _get_issue_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub Get Issue Node ---")
+        response = await self._call_get_github_issue(state.repo_name, state.issue_number)
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _comment_issue_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub Comment on Issue Node ---")
-        repo_name = state.get("repo_name")
-        issue_number = state.get("issue_number")
-        comment_body = state.get("comment_body")
-        if not repo_name or not issue_number or not comment_body:
-            return {
-                "api_response": {"error": "Repo, issue num, or comment not extracted."},
-                "error_message": "Params missing for comment",
-            }
-        response = self._call_comment_on_github_issue(repo_name, issue_number, comment_body)
-        print(f"GitHub API Response: {response}")
+    async def _comment_issue_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub Comment on Issue Node ---")
+        response = await self._call_comment_on_github_issue(state.repo_name, state.issue_number, state.comment_body)
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _slack_message_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing Slack Message Node ---")
-        user_query = state["user_query"]
+    async def _slack_message_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing Slack Message Node ---")
+        user_query = state.user_query
 
         # Extract Slack target and message
         slack_target = self._extract_slack_target(user_query)
@@ -775,120 +1616,85 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
         user = slack_target["user"]
         channel = slack_target["channel"] if not user else None
 
-        response = self._call_send_slack_message(message, channel=channel, user=user)
-        print(f"Slack API Response: {response}")
+        response = await self._call_send_slack_message(message, channel=channel, user=user)
+        logger.debug("Slack API Response: %s", response)
         return {"api_response": response}
 
-    def _list_branches_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub List Branches Node ---")
-        repo_name = state.get("repo_name")
-        if not repo_name:
-            return {
-                "api_response": {"error": "Repository name not extracted for listing branches."},
-                "error_message": "Repo name missing",
-            }
-        response = self._call_list_github_branches(repo_name)
-        print(f"GitHub API Response: {response}")
+    async def _list_branches_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub List Branches Node ---")
+        response = await self._call_list_github_branches(state.repo_name)
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _get_branch_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub Get Branch Node ---")
-        repo_name = state.get("repo_name")
-        branch_name = state.get("branch_name")
-        if not repo_name or not branch_name:
-            return {
-                "api_response": {"error": "Repository name or branch name not extracted."},
-                "error_message": "Repo/Branch name missing",
-            }
-        response = self._call_get_github_branch(repo_name, branch_name)
-        print(f"GitHub API Response: {response}")
+    async def _get_branch_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub Get Branch Node ---")
+        response = await self._call_get_github_branch(state.repo_name, state.branch_name)
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _create_branch_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing GitHub Create Branch Node ---")
-        repo_name = state.get("repo_name")
-        branch_name = state.get("branch_name")
-        source_branch = state.get("source_branch", "main")
-
-        if not repo_name or not branch_name:
-            return {
-                "api_response": {"error": "Repository name or branch name not extracted."},
-                "error_message": "Repo/Branch name missing",
-            }
-
-        response = self._call_create_github_branch(repo_name, branch_name, source_branch)
-        print(f"GitHub API Response: {response}")
+    async def _create_branch_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing GitHub Create Branch Node ---")
+        response = await self._call_create_github_branch(
+            state.repo_name, state.branch_name, state.source_branch or "main"
+        )
+        logger.debug("GitHub API Response: %s", response)
         return {"api_response": response}
 
-    def _unhandled_action_node(self, state: WorkflowState) -> Dict[str, Any]:
-        print("--- Executing Unhandled Action Node ---")
-        error_msg = state.get("error_message", "The user query could not be handled by available actions.")
-
-        # Provide helpful suggestions
-        suggestions = [
-            "Try: 'create an issue in repo my-project'",
-            "Try: 'list issues in repository backend'",
-            "Try: 'show issue #123 in repo frontend'",
-            "Try: 'send a message to the team'",
-        ]
+    # Node methods that can also run as a compound query's secondary action.
+    _SECONDARY_HANDLERS = {
+        "github_create_issue": "_create_issue_node",
+        "github_list_issues": "_list_issues_node",
+        "github_get_issue": "_get_issue_node",
+        "github_comment_issue": "_comment_issue_node",
+        "github_list_branches": "_list_branches_node",
+        "github_get_branch": "_get_branch_node",
+        "github_create_branch": "_create_branch_node",
+        "slack_send_message": "_slack_message_node",
+    }
+
+    async def _secondary_action_node(self, state: WorkflowState) -> Dict[str, Any]:
+        """Runs one extra action of a compound query alongside the primary branch."""
+        logger.debug("--- Executing Secondary Action Node: %s ---", state.action_type)
+        update = _param_error(state) or await getattr(self, self._SECONDARY_HANDLERS[state.action_type])(state)
+        result = {"action_type": state.action_type, "error_message": None}
+        result.update((name, getattr(state, name)) for name in CLASSIFICATION_FIELDS)
+        result.update(update)
+        return {"secondary_responses": [result]}
 
+    def _unhandled_action_node(self, state: WorkflowState) -> Dict[str, Any]:
+        logger.debug("--- Executing Unhandled Action Node ---")
+        param_error = _param_error(state)
+        if param_error is not None:
+            return param_error
         return {
             "api_response": {
-                "message": "I didn't understand your request. Here are some things you can try:",
-                "suggestions": suggestions,
-                "your_request": state["user_query"],
+                "message": _UNHANDLED_MESSAGE,
+                "suggestions": _UNHANDLED_SUGGESTIONS,
+                "your_request": state.user_query,
             }
         }
 
-    def _build_graph(self) -> StateGraph:
+    @classmethod
+    def _build_graph(cls) -> StateGraph:
         workflow_builder = StateGraph(WorkflowState)
 
-        workflow_builder.add_node("classify_and_extract", self._classify_and_extract_parameters_node)
-        workflow_builder.add_node("github_create_issue_node", self._create_issue_node)
-        workflow_builder.add_node("github_list_issues_node", self._list_issues_node)
-        workflow_builder.add_node("github_get_issue_node", self._get_issue_node)
-        workflow_builder.add_node("github_comment_issue_node", self._comment_issue_node)
-        workflow_builder.add_node("slack_message_node", self._slack_message_node)
-        workflow_builder.add_node("unhandled_action_node", self._unhandled_action_node)
-        workflow_builder.add_node("general_response_node", self._general_response_node)
-        workflow_builder.add_node("needs_clarification_node", self._needs_clarification_node)
-        workflow_builder.add_node("github_list_branches_node", self._list_branches_node)
-        workflow_builder.add_node("github_get_branch_node", self._get_branch_node)
-        workflow_builder.add_node("github_create_branch_node", self._create_branch_node)
+        for node_name, method_name in _GRAPH_NODES.items():
+            workflow_builder.add_node(node_name, _processor_node(getattr(cls, method_name)))
         workflow_builder.set_entry_point("classify_and_extract")
 
-        workflow_builder.add_conditional_edges(
-            "classify_and_extract",
-            lambda state: state.get("action_type", "unhandled"),
-            {
-                "github_create_issue": "github_create_issue_node",
-                "github_list_issues": "github_list_issues_node",
-                "github_get_issue": "github_get_issue_node",
-                "github_comment_issue": "github_comment_issue_node",
-                "slack_send_message": "slack_message_node",
-                "unhandled": "unhandled_action_node",
-                "general_response": "general_response_node",
-                "needs_clarification": "needs_clarification_node",
-                "github_list_branches": "github_list_branches_node",
-                "github_get_branch": "github_get_branch_node",
-                "github_create_branch": "github_create_branch_node",
-            },
-        )
-
-        workflow_builder.add_edge("github_create_issue_node", END)
-        workflow_builder.add_edge("github_list_issues_node", END)
-        workflow_builder.add_edge("github_get_issue_node", END)
-        workflow_builder.add_edge("github_comment_issue_node", END)
-        workflow_builder.add_edge("slack_message_node", END)
-        workflow_builder.add_edge("unhandled_action_node", END)
-        workflow_builder.add_edge("general_response_node", END)
-        workflow_builder.add_edge("needs_clarification_node", END)
-        workflow_builder.add_edge("github_list_branches_node", END)
-        workflow_builder.add_edge("github_get_branch_node", END)
-        workflow_builder.add_edge("github_create_branch_node", END)
+        workflow_builder.add_conditional_edges("classify_and_extract", _route_action, _ROUTES)
+        for node_name in _ROUTES.values():
+            workflow_builder.add_edge(node_name, END)
+        workflow_builder.add_edge("secondary_action_node", END)
         return workflow_builder.compile()
 
-    def _format_response(self, final_state: WorkflowState) -> str:
+    def _format_response(self, final_state: Dict[str, Any]) -> str:
+        text = self._format_action(final_state)
+        for secondary in final_state.get("secondary_responses") or ():
+            text += "\n\n" + self._format_action(secondary)
+        return text
+
+    def _format_action(self, final_state: Dict[str, Any]) -> str:
         action_type = final_state.get("action_type")
         api_response = final_state.get("api_response")
         error_message = final_state.get("error_message")
@@ -902,152 +1708,174 @@ CLARIFICATION_NEEDED: [yes if user needs to specify what issue to create, or no]
         if isinstance(api_response, dict) and api_response.get("error"):
             return f"API Error ({action_type}): {api_response.get('error')}. Details: {api_response.get('details', 'N/A')}"
 
-        if action_type == "github_create_issue":
-            if api_response.get("html_url"):
-                return f"✅ Successfully created GitHub issue: {api_response['html_url']}"
-            return "❌ GitHub issue creation seems to have failed or returned an unexpected response."
-
-        elif action_type == "github_list_issues":
-            if isinstance(api_response, list):
-                issues_summary = [
-                    f"#{issue['number']} - {issue['title']}" for issue in api_response[:3]
-                ]  # Show first 3
-                summary_str = "\n".join(issues_summary)
-                if len(api_response) > 3:
-                    summary_str += f"\n... and {len(api_response) - 3} more."
-                return f"📋 Found {len(api_response)} issues in repo '{final_state.get('repo_name')}':\n{summary_str}"
-            return "❌ Could not retrieve or parse the list of GitHub issues."
-
-        elif action_type == "github_get_issue":
-            if api_response.get("html_url") and api_response.get("title"):
-                return f"🔍 Details for issue #{api_response.get('number')} in repo '{final_state.get('repo_name')}':\nTitle: {api_response['title']}\nURL: {api_response['html_url']}"
-            return "❌ Could not retrieve details for the GitHub issue."
-
-        elif action_type == "github_comment_issue":
-            if api_response.get("html_url"):
-                return f"💬 Successfully commented on GitHub issue: {api_response['html_url']}"
-            return "❌ GitHub issue comment seems to have failed or returned an unexpected response."
-
-        elif action_type == "slack_send_message":
-            if api_response.get("ok"):
-                return f"💬 Successfully sent Slack message to channel {api_response.get('channel')} (Timestamp: {api_response.get('ts')})."
-            else:
-                return f"❌ Failed to send Slack message. Error: {api_response.get('error', 'Unknown Slack error')}"
-
-        elif action_type == "unhandled":
-            if api_response.get("suggestions"):
-                suggestions_text = "\n".join(f"• {s}" for s in api_response["suggestions"])
-                return f"🤔 {api_response.get('message', 'I couldn\'t understand your request.')}\n\n{suggestions_text}\n\nYour request was: '{api_response.get('your_request')}'"
-            return f"🤔 I couldn't understand or handle your request. Please try being more specific."
-        # Add this case in _format_response:
-        elif action_type == "general_response":
-            if api_response and api_response.get("message"):
-                return api_response["message"]
-            return "Hello! How can I help you today?"
-        elif action_type == "github_list_branches":
-            if isinstance(api_response, list):
-                branches_summary = [
-                    f"• {branch['name']}" + (f" (default)" if branch.get("protected") else "")
-                    for branch in api_response[:10]  # Show first 10
-                ]
-                summary_str = "\n".join(branches_summary)
-                if len(api_response) > 10:
-                    summary_str += f"\n... and {len(api_response) - 10} more."
-                return (
-                    f"🌿 Found {len(api_response)} branches in repo '{final_state.get('repo_name')}':\n{summary_str}"
-                )
-            return "❌ Could not retrieve or parse the list of GitHub branches."
-
-        elif action_type == "github_get_branch":
-            if api_response.get("name"):
-                commit_sha = api_response.get("commit", {}).get("sha", "Unknown")[:8]
-                return f"🌿 Details for branch '{api_response['name']}' in repo '{final_state.get('repo_name')}':\nLatest commit: {commit_sha}\nProtected: {api_response.get('protected', False)}"
-            return "❌ Could not retrieve details for the GitHub branch."
-
-        elif action_type == "github_create_branch":
-            if api_response.get("ref"):
-                branch_name = api_response["ref"].replace("refs/heads/", "")
-                return f"✅ Successfully created branch '{branch_name}' in repo '{final_state.get('repo_name')}' from '{final_state.get('source_branch', 'main')}'"
-            return "❌ GitHub branch creation seems to have failed or returned an unexpected response."
-
-        return f"Action '{action_type}' completed. Raw response: {json.dumps(api_response, indent=2)}"
+        formatter = self._FORMATTERS.get(action_type)
+        if formatter is None:
+            return self._fmt_default(final_state, api_response)
+        return formatter(self, final_state, api_response)
+
+    # --- Response formatters, one per action_type ---
+    def _fmt_create_issue(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("html_url"):
+            return f"✅ Successfully created GitHub issue: {api_response['html_url']}"
+        return "❌ GitHub issue creation seems to have failed or returned an unexpected response."
+
+    def _fmt_list_issues(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if isinstance(api_response.get("issues"), list):
+            issues = api_response["issues"]
+            total_count = api_response.get("total_count", len(issues))
+            summary_str = "\n".join(f"#{issue['number']} - {issue['title']}" for issue in islice(issues, 3))
+            extra = max(0, total_count - 3)
+            if extra:
+                more = f"at least {extra}" if api_response.get("total_is_lower_bound") else extra
+                summary_str += f"\n... and {more} more."
+            found = f"at least {total_count}" if api_response.get("total_is_lower_bound") else total_count
+            return f"📋 Found {found} issues in repo '{final_state.get('repo_name')}':\n{summary_str}"
+        return "❌ Could not retrieve or parse the list of GitHub issues."
+
+    def _fmt_get_issue(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("html_url") and api_response.get("title"):
+            return f"🔍 Details for issue #{api_response.get('number')} in repo '{final_state.get('repo_name')}':\nTitle: {api_response['title']}\nURL: {api_response['html_url']}"
+        return "❌ Could not retrieve details for the GitHub issue."
+
+    def _fmt_comment_issue(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("html_url"):
+            return f"💬 Successfully commented on GitHub issue: {api_response['html_url']}"
+        return "❌ GitHub issue comment seems to have failed or returned an unexpected response."
+
+    def _fmt_slack_message(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("ok"):
+            return f"💬 Successfully sent Slack message to channel {api_response.get('channel')} (Timestamp: {api_response.get('ts')})."
+        return f"❌ Failed to send Slack message. Error: {api_response.get('error', 'Unknown Slack error')}"
+
+    def _fmt_unhandled(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("suggestions"):
+            suggestions_text = "\n".join(f"• {s}" for s in api_response["suggestions"])
+            message = api_response.get("message", "I couldn't understand your request.")
+            return f"🤔 {message}\n\n{suggestions_text}\n\nYour request was: '{api_response.get('your_request')}'"
+        return "🤔 I couldn't understand or handle your request. Please try being more specific."
+
+    def _fmt_general_response(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("message"):
+            return api_response["message"]
+        return "Hello! How can I help you today?"
+
+    def _fmt_list_branches(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if isinstance(api_response, list):
+            summary_str = "\n".join(
+                f"• {branch['name']}" + (" (default)" if branch.get("protected") else "")
+                for branch in islice(api_response, 10)  # Show first 10
+            )
+            if len(api_response) > 10:
+                summary_str += f"\n... and {len(api_response) - 10} more."
+            return f"🌿 Found {len(api_response)} branches in repo '{final_state.get('repo_name')}':\n{summary_str}"
+        return "❌ Could not retrieve or parse the list of GitHub branches."
+
+    def _fmt_get_branch(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("name"):
+            commit_sha = api_response.get("commit", {}).get("sha", "Unknown")[:8]
+            return f"🌿 Details for branch '{api_response['name']}' in repo '{final_state.get('repo_name')}':\nLatest commit: {commit_sha}\nProtected: {api_response.get('protected', False)}"
+        return "❌ Could not retrieve details for the GitHub branch."
+
+    def _fmt_create_branch(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        if api_response.get("ref"):
+            branch_name = api_response["ref"].removeprefix("refs/heads/")
+            return f"✅ Successfully created branch '{branch_name}' in repo '{final_state.get('repo_name')}' from '{final_state.get('source_branch') or 'main'}'"
+        return "❌ GitHub branch creation seems to have failed or returned an unexpected response."
+
+    def _fmt_default(self, final_state: Dict[str, Any], api_response: Any) -> str:
+        return f"Action '{final_state.get('action_type')}' completed. Raw response: {orjson.dumps(api_response, option=orjson.OPT_INDENT_2).decode()}"
+
+    # action_type -> formatter function, built once with the class instead of bound per processor.
+    _FORMATTERS = {
+        "github_create_issue": _fmt_create_issue,
+        "github_list_issues": _fmt_list_issues,
+        "github_get_issue": _fmt_get_issue,
+        "github_comment_issue": _fmt_comment_issue,
+        "slack_send_message": _fmt_slack_message,
+        "unhandled": _fmt_unhandled,
+        "general_response": _fmt_general_response,
+        "github_list_branches": _fmt_list_branches,
+        "github_get_branch": _fmt_get_branch,
+        "github_create_branch": _fmt_create_branch,
+    }
+
+    async def aprocess_query(self, user_query: str) -> str:
+        logger.info("--- Processing Query: %s ---", user_query)
+        initial_state = WorkflowState(user_query=user_query)
+        final_state = await self.app.ainvoke(
+            initial_state, config={"configurable": {"processor": self}, "max_concurrency": GRAPH_MAX_CONCURRENCY}
+        )
+        logger.debug("--- Internal Final Workflow State --- %s", final_state)
+        return self._format_response(final_state)
 
     def process_query(self, user_query: str) -> str:
-        print(f"\n--- Processing Query: {user_query} ---")
-        initial_state: WorkflowState = {
-            "user_query": user_query,
-            "action_type": None,
-            "repo_name": None,
-            "issue_number": None,
-            "comment_body": None,
-            "issue_title": None,
-            "issue_body": None,
-            "api_response": None,
-            "error_message": None,
-            "branch_name": None,
-            "branch_list": None,
-            "source_branch": None,
-            "needs_clarification": None,
-        }
-        final_state = self.app.invoke(initial_state)
-        # print(f"--- Internal Final Workflow State --- \n{json.dumps(final_state, indent=2)}") # For debugging
-        return self._format_response(final_state)
+        """Synchronous facade over :meth:`aprocess_query` for callers without an event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Reuse one private loop so pooled connections stay bound to the loop that opened them.
+            if self._sync_loop is None:
+                self._sync_loop = asyncio.new_event_loop()
+            return self._sync_loop.run_until_complete(self.aprocess_query(user_query))
+        raise RuntimeError("process_query() cannot run inside an event loop; await aprocess_query() instead.")
+
+    async def aclose(self) -> None:
+        """Releases the processor's HTTP clients; the shared pools stay open for other processors."""
+        await self._github.aclose()
+        await self._slack.aclose()
 
     def _extract_slack_target(self, query: str) -> Dict[str, str]:
         """
         IMPROVED: Better extraction of Slack message target and message text.
         """
-        import re
-
-        # Try to extract user mention (e.g., '@john', 'to John', 'to @john')
-        user_match = re.search(r"(?:to|@)\s*@?([a-zA-Z0-9._-]+)", query)
-        
-        # IMPROVED: Better channel extraction patterns
-        channel_patterns = [
-            r"(?:channel|in|to)\s+#([a-zA-Z0-9_-]+)",  # "to #channel"
-            r"#([a-zA-Z0-9_-]+)",  # Direct "#channel"
-            r"(?:channel|in|to)\s+([a-zA-Z0-9_-]+)",  # "to channel"
-        ]
+        # An email recipient is one token; take it out first so its '@' isn't read as a mention
+        # and its parts don't end up in the channel or the message.
+        email_match = _SLACK_EMAIL_RE.search(query)
+        if email_match:
+            user = email_match.group(0)
+            query = f"{query[:email_match.start()]}{query[email_match.end():]}"
+        else:
+            # Try to extract user mention (e.g., '@john', 'to John', 'to @john')
+            user_match = _SLACK_USER_RE.search(query)
+            user = user_match.group(1) if user_match else None
         
         channel_match = None
-        for pattern in channel_patterns:
-            channel_match = re.search(pattern, query, re.IGNORECASE)
+        for pattern in _SLACK_CHANNEL_PATTERNS:
+            channel_match = pattern.search(query)
             if channel_match:
                 break
         
-        # IMPROVED: Better message extraction
-        msg_patterns = [
-            r'["\']([^"\']+)["\']',  # Quoted strings first
-            r"(?:send|message|notify|tell|inform)\s+(?:slack\s+)?(?:message\s*)?:?\s*(.+?)(?:\s+(?:to|in|@|#)|\s*$)",
-            r"(?:send|message|notify|tell|inform).*?:\s*(.+)",
-        ]
-        
         message = None
-        for pattern in msg_patterns:
-            msg_match = re.search(pattern, query, re.IGNORECASE | re.DOTALL)
+        for pattern in _SLACK_MESSAGE_PATTERNS:
+            msg_match = pattern.search(query)
             if msg_match:
                 potential_message = msg_match.group(1).strip()
+                if len(potential_message) <= 2:
+                    # Stripping only shortens it, so it can never qualify.
+                    continue
                 # Clean up the message
-                potential_message = re.sub(r'\s+(?:to|@|in|channel)\s+.+$', '', potential_message, flags=re.IGNORECASE)
-                if potential_message and len(potential_message) > 2:
+                potential_message = _SLACK_TAIL_STRIP_RE.sub('', potential_message)
+                if len(potential_message) > 2:
                     message = potential_message
                     break
         
-        user = user_match.group(1) if user_match else None
         channel = f"#{channel_match.group(1)}" if channel_match else "#general"
         
         # Clean up the message
         if message:
             message = message.strip(' .,!?')
-            # Remove any remaining channel/user references
-            message = re.sub(r'(?:to|@|#)\s*[a-zA-Z0-9._-]+', '', message).strip()
+            # Remove any remaining channel/user references; the substring test spares the sub on plain messages
+            if "to" in message or "@" in message or "#" in message:
+                message = _SLACK_TARGET_STRIP_RE.sub('', message).strip()
         else:
             message = "Hello from DevCascade!"  # Default message
 
-        print(f"DEBUG - Extracted - User: {user}, Channel: {channel}, Message: {message}")
+        logger.debug("Extracted - User: %s, Channel: %s, Message: %s", user, channel, message)
         return {"user": user, "channel": channel, "message": message}
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     # TODO: Replace with your actual API keys and configuration from a secure source
     GEMINI_API_KEY = "<gemini api key>"  # Replace with your Gemini API Key
     GITHUB_TOKEN = "<your_github_token>"  # Replace with your GitHub token
@@ -1058,32 +1886,37 @@ if __name__ == "__main__":
         print("WARNING: Please replace placeholder API keys and tokens in the __main__ block.")
         # You might want to exit or skip execution if keys are not set
 
-    try:
+    queries = [
+        "Create an issue in repo cicdrelease about a login bug with details: The login page is broken after the last update.",
+        "List issues for repository my-test-app",
+        "Show me details for issue 1 in repo cicdrelease",
+        "Comment on issue #1 in repo cicdrelease saying 'I am looking into this now.'",
+        "Send a slack message: Hello team, the new build is ready for testing.",
+        "List branches in repo cicdrelease",  # NEW
+        "Show branch main in repo cicdrelease",  # NEW
+        "Create branch feature-auth from main in repo cicdrelease",  # NEW
+        "What branches exist in my-test-app repository",  # NEW
+        "What is the weather today?",  # Unhandled
+    ]
+
+    async def main() -> None:
         processor = WorkflowProcessor(
             gemini_api_key=GEMINI_API_KEY,
             github_token=GITHUB_TOKEN,
             slack_token=SLACK_TOKEN,
             github_owner=GITHUB_OWNER,
         )
+        try:
+            # The queries are independent, so their API round-trips can overlap.
+            responses = await asyncio.gather(*[processor.aprocess_query(q) for q in queries])
+            for query, friendly_response in zip(queries, responses):
+                print(f"\nUser Query: {query}\nResponse: {friendly_response}\n" + "-" * 50)
+        finally:
+            await processor.aclose()
 
-        queries = [
-            "Create an issue in repo cicdrelease about a login bug with details: The login page is broken after the last update.",
-            "List issues for repository my-test-app",
-            "Show me details for issue 1 in repo cicdrelease",
-            "Comment on issue #1 in repo cicdrelease saying 'I am looking into this now.'",
-            "Send a slack message: Hello team, the new build is ready for testing.",
-            "List branches in repo cicdrelease",  # NEW
-            "Show branch main in repo cicdrelease",  # NEW
-            "Create branch feature-auth from main in repo cicdrelease",  # NEW
-            "What branches exist in my-test-app repository",  # NEW
-            "What is the weather today?",  # Unhandled
-        ]
-
-        for query in queries:
-            friendly_response = processor.process_query(query)
-            print(f"\nUser Query: {query}\nResponse: {friendly_response}\n" + "-" * 50)
-
+    try:
+        asyncio.run(main())
     except ValueError as e:
         print(f"Initialization Error: {e}")
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
\ No newline at end of file
+        print(f"An unexpected error occurred: {e}")
@@ -1,43 +1,61 @@
-import json
+import asyncio
+import functools
 import logging
+import os
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List
+from itertools import chain, repeat
+from typing import Any, Dict, List, Optional, Union
 
 import google.generativeai as genai
+import orjson
+from core.cache import ResponseCache
 from core.config import settings
-from fastapi import Request
+from core.gemini import GEMINI_CACHE_ENABLED, embed_text
+from fastapi import Request, Response
+from pydantic import BaseModel
 from views.enums import WorkflowStatus
 from views.schemas.workflow import Workflow, WorkflowStep
 
 logger = logging.getLogger(__name__)
 
-workflows_db = {}
-
-GEMINI_API_KEY = settings.GEMINI_API_KEY
 
+@dataclass(slots=True, frozen=True)
+class StoredWorkflow:
+    """A history entry: the workflow's JSON, encoded once when stored, plus the fields endpoints filter on."""
 
-def get_user_info(request: Request) -> Dict[str, str]:
-    """Extract user info from headers or return defaults"""
-    return {
-        "name": request.headers.get("X-User-Name", "Anonymous User"),
-        "email": request.headers.get("X-User-Email", "user@example.com"),
-        "github_username": request.headers.get("X-GitHub-Username", ""),
-    }
+    user_email: str
+    status: WorkflowStatus
+    created_at: datetime
+    json: bytes
 
 
-async def process_with_gemini(message: str, user_context: dict) -> Dict[str, Any]:
-    """Process user message with Gemini AI"""
-    if not GEMINI_API_KEY:
-        return {
-            "response": "AI processing is not available. Please configure GEMINI_API_KEY.",
-            "workflow_needed": False,
-            "services_required": [],
-            "actions": [],
-        }
+# In-memory workflow history in LRU order (reads through get_workflow refresh an entry); trimmed to
+# MAX_WORKFLOWS so a long-running server stays bounded.
+MAX_WORKFLOWS = 10_000
+workflows_db: "OrderedDict[str, StoredWorkflow]" = OrderedDict()
 
-    try:
-        prompt = f"""
+GEMINI_API_KEY = settings.GEMINI_API_KEY
+GEMINI_MODEL = "gemini-1.5-flash"
+# Every chat reply comes back as this JSON object, so the text never needs sniffing or wrapping.
+CHAT_REPLY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "response": {"type": "string"},
+        "workflow_needed": {"type": "boolean"},
+        "services_required": {"type": "array", "items": {"type": "string"}},
+        "actions": {"type": "array", "items": {"type": "string"}},
+        "workflow_title": {"type": "string"},
+    },
+    "required": ["response", "workflow_needed", "services_required", "actions"],
+}
+CHAT_GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": CHAT_REPLY_SCHEMA}
+
+# The system prompt is static apart from the user context and the message, so its fixed segments
+# are built once here and joined around the two variable parts per call.
+_PROMPT_INTRO = """
 You are DevCascade, an intelligent and conversational DevOps assistant with dual capabilities: engaging in natural conversation AND automating complex workflows.
 
 ## Your Personality
@@ -46,18 +64,10 @@ You are DevCascade, an intelligent and conversational DevOps assistant with dual
 - Can chat naturally about any topic
 - Expert in DevOps, software development, and workflow automation
 - Proactive in suggesting automation opportunities
-
-## User Context
-User: {user_context.get('name', 'Team Member')}
-Email: {user_context.get('email', 'Not available')}
-GitHub Username: {user_context.get('github_username', 'Not available')}
-Github Email: {user_context.get('github_email', 'Not available')}
-Role: {user_context.get('role', 'Developer')}
-Connected Services: {', '.join(user_context.get('connected_services', []))}
-Current Project: {user_context.get('current_project', 'Not specified')}
-
-## Message Analysis
-User Message: {message}
+"""
+_PROMPT_CONTEXT_LABEL = "\n## User Context\n"
+_PROMPT_MESSAGE_LABEL = "\n\n## Message Analysis\nUser Message: "
+_PROMPT_TAIL = """
 
 ## Core Capabilities
 
@@ -146,25 +156,130 @@ Response: "I'll help you create a GitHub issue for the login bug. I need a few d
 Analyze the user's message and provide an appropriate response based on the conversation type identified. Be helpful, natural, and genuinely useful in every interaction.
 """
 
-        if GEMINI_API_KEY:
-            genai.configure(api_key=GEMINI_API_KEY)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-
-        response = model.generate_content(prompt)
-
-        try:
-            # Try to parse as JSON first
-            result = json.loads(response.text)
-            return result
-        except json.JSONDecodeError:
-            # If not JSON, extract the response text and create a basic structure
-            return {
-                "response": response.text,
-                "workflow_needed": False,
-                "services_required": [],
-                "actions": [],
-                "workflow_title": "",
-            }
+
+# The "## User Context" section; fields missing from the user context fall back to these defaults.
+_USER_CONTEXT_TEMPLATE = (
+    "User: {name}\n"
+    "Email: {email}\n"
+    "GitHub Username: {github_username}\n"
+    "Github Email: {github_email}\n"
+    "Role: {role}\n"
+    "Connected Services: {connected_services}\n"
+    "Current Project: {current_project}"
+)
+_USER_CONTEXT_DEFAULTS = {
+    "name": "Team Member",
+    "email": "Not available",
+    "github_username": "Not available",
+    "github_email": "Not available",
+    "role": "Developer",
+    "current_project": "Not specified",
+}
+
+
+def _user_context_block(user_context: dict) -> str:
+    """Renders the "## User Context" section of the prompt."""
+    return _USER_CONTEXT_TEMPLATE.format_map(
+        {
+            **_USER_CONTEXT_DEFAULTS,
+            **user_context,
+            "connected_services": ", ".join(user_context.get("connected_services", [])),
+        }
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model() -> genai.GenerativeModel:
+    """Returns the JSON-mode chat model, configured once for the process."""
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL, generation_config=CHAT_GENERATION_CONFIG)
+
+
+# Contexts differ per user (and per connected-service set), so only the most recent few are kept.
+@functools.lru_cache(maxsize=32)
+def _reply_cache(context_block: str) -> ResponseCache:
+    """Chat replies for one rendered user context; replies address the user, so contexts never share."""
+    return ResponseCache(maxsize=64, ttl=3600, similarity_threshold=0.93, enabled=GEMINI_CACHE_ENABLED)
+
+
+def _encode_model(obj: Any) -> Any:
+    """orjson fallback for pydantic models; datetimes and enums inside are encoded natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def workflow_json_response(payload: Union[StoredWorkflow, List[StoredWorkflow]]) -> Response:
+    """Responds with a stored workflow (or a list of them) straight from the JSON encoded at store time."""
+    if isinstance(payload, list):
+        content = b"[" + b",".join(workflow.json for workflow in payload) + b"]"
+    else:
+        content = payload.json
+    return Response(content=content, media_type="application/json")
+
+
+def get_workflow(workflow_id: str) -> Optional[StoredWorkflow]:
+    """Looks up a stored workflow and marks it recently used, so eviction takes older ones first."""
+    workflow = workflows_db.get(workflow_id)
+    if workflow is not None:
+        workflows_db.move_to_end(workflow_id)
+    return workflow
+
+
+def remove_workflow(workflow_id: str) -> None:
+    """Removes a workflow from the history."""
+    del workflows_db[workflow_id]
+
+
+def get_user_info(request: Request) -> Dict[str, str]:
+    """Extract user info from headers or return defaults"""
+    return {
+        "name": request.headers.get("X-User-Name", "Anonymous User"),
+        "email": request.headers.get("X-User-Email", "user@example.com"),
+        "github_username": request.headers.get("X-GitHub-Username", ""),
+    }
+
+
+async def process_with_gemini(message: str, user_context: dict) -> Dict[str, Any]:
+    """Process user message with Gemini AI"""
+    if not GEMINI_API_KEY:
+        return {
+            "response": "AI processing is not available. Please configure GEMINI_API_KEY.",
+            "workflow_needed": False,
+            "services_required": [],
+            "actions": [],
+        }
+
+    try:
+        model = _get_model()
+        context_block = _user_context_block(user_context)
+        reply_cache = _reply_cache(context_block)
+        cache_key = ResponseCache.key_for(message, namespace=f"chat:{GEMINI_MODEL}")
+        cached = reply_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = "".join(
+            (_PROMPT_INTRO, _PROMPT_CONTEXT_LABEL, context_block, _PROMPT_MESSAGE_LABEL, message, _PROMPT_TAIL)
+        )
+
+        # Embedding and generation run together; a semantic hit cancels the generation.
+        generation = asyncio.ensure_future(model.generate_content_async(prompt))
+        embedding = await embed_text(message)
+        if embedding is not None:
+            cached = reply_cache.get_similar(embedding)
+            if cached is not None:
+                generation.cancel()
+                return cached
+        response = await generation
+
+        # JSON mode guarantees a CHAT_REPLY_SCHEMA object, so there is no prose reply to wrap.
+        result = orjson.loads(response.text)
+        # Only conversational replies may be reused for merely similar wording; a reply that plans a
+        # workflow carries actions and a title specific to the exact message.
+        semantic_key = None if result.get("workflow_needed") else embedding
+        reply_cache.set(cache_key, result, embedding=semantic_key)
+        return result
     except Exception as e:
         logger.error(f"Gemini processing error: {str(e)}")
         return {
@@ -176,51 +291,92 @@ Analyze the user's message and provide an appropriate response based on the conv
         }
 
 
+def _simulate_jira(details: Dict[str, Any], short_id: str) -> None:
+    details["ticket_id"] = f"PROJ-{short_id[:4].upper()}"
+
+
+def _simulate_jenkins(details: Dict[str, Any], short_id: str) -> None:
+    details["build_number"] = f"#{short_id[:3]}"
+
+
+def _simulate_slack(details: Dict[str, Any], short_id: str) -> None:
+    details["channel"] = "#general"
+    details["message_id"] = f"msg_{short_id[:6]}"
+
+
+def _simulate_github(details: Dict[str, Any], short_id: str) -> None:
+    details["repository"] = "user/repo"
+    details["commit_sha"] = short_id[:7]
+
+
+# Service keyword -> (action keyword it also needs, "" for any action; detail filler), checked in order.
+_SIMULATED_RESULTS = {
+    "jira": ("create", _simulate_jira),
+    "jenkins": ("deploy", _simulate_jenkins),
+    "slack": ("", _simulate_slack),
+    "github": ("", _simulate_github),
+}
+
+
+async def _execute_step(action: str, service: str, id_bytes: bytes, timestamp: datetime) -> WorkflowStep:
+    """Runs one workflow step; ``id_bytes`` seeds any simulated ids."""
+    # Simulate different execution results
+    status = "completed"
+    details = {"message": f"Successfully executed: {action}"}
+
+    # Simulate some realistic workflow actions
+    service_lower, action_lower = service.lower(), action.lower()
+    for service_key, (action_key, simulate) in _SIMULATED_RESULTS.items():
+        if service_key in service_lower and action_key in action_lower:
+            simulate(details, id_bytes.hex())
+            break
+
+    # Every value is built right here, so validation is skipped (model_construct).
+    return WorkflowStep.model_construct(
+        action=action, service=service, status=status, details=details, timestamp=timestamp
+    )
+
+
 async def execute_workflow_actions(
     actions: List[str], services: List[str], user_name: str, user_email: str, workflow_title: str = ""
 ) -> str:
     """Execute workflow actions and store in database"""
-    workflow_id = str(uuid.uuid4())
-    workflow_steps = []
-
-    # Create workflow steps
-    for i, action in enumerate(actions):
-        service = services[i] if i < len(services) else "system"
-
-        # Simulate different execution results
-        status = "completed"
-        details = {"message": f"Successfully executed: {action}"}
-
-        # Simulate some realistic workflow actions
-        if "create" in action.lower() and "jira" in service.lower():
-            details["ticket_id"] = f"PROJ-{uuid.uuid4().hex[:4].upper()}"
-        elif "deploy" in action.lower() and "jenkins" in service.lower():
-            details["build_number"] = f"#{uuid.uuid4().hex[:3]}"
-        elif "slack" in service.lower():
-            details["channel"] = "#general"
-            details["message_id"] = f"msg_{uuid.uuid4().hex[:6]}"
-        elif "github" in service.lower():
-            details["repository"] = "user/repo"
-            details["commit_sha"] = uuid.uuid4().hex[:7]
-
-        step = WorkflowStep(
-            action=action, service=service, status=status, details=details, timestamp=datetime.utcnow()
+    # One timestamp for the whole run: every step and the record itself share it.
+    now = datetime.utcnow()
+    # One urandom read for the whole run: 16 bytes for the workflow's uuid4, then 4 per step, since
+    # simulated ids need at most 7 hex chars.
+    random_bytes = os.urandom(16 + 4 * len(actions))
+    workflow_id = str(uuid.UUID(bytes=random_bytes[:16], version=4))
+
+    # Create workflow steps; they are independent, so they run concurrently and gather keeps their order.
+    # Steps beyond the listed services run on "system"; surplus services are ignored.
+    workflow_steps = await asyncio.gather(
+        *(
+            _execute_step(action, service, random_bytes[16 + 4 * i : 20 + 4 * i], now)
+            for i, (action, service) in enumerate(zip(actions, chain(services, repeat("system"))))
         )
-        workflow_steps.append(step)
+    )
 
     # Create workflow record
-    workflow = Workflow(
+    workflow = Workflow.model_construct(
         id=workflow_id,
         user_name=user_name,
         user_email=user_email,
-        title=workflow_title or f"Automated Workflow - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}",
+        title=workflow_title or f"Automated Workflow - {now.strftime('%Y-%m-%d %H:%M')}",
         description=f"AI-generated workflow with {len(actions)} steps",
         status=WorkflowStatus.COMPLETED,
         steps=workflow_steps,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
+        created_at=now,
+        updated_at=now,
     )
 
-    # Store in database
-    workflows_db[workflow_id] = workflow.dict()
+    # Store in database; only the encoded JSON and the filter fields are kept, not the model
+    workflows_db[workflow_id] = StoredWorkflow(
+        user_email=user_email,
+        status=workflow.status,
+        created_at=now,
+        json=orjson.dumps(workflow, default=_encode_model),
+    )
+    while len(workflows_db) > MAX_WORKFLOWS:
+        workflows_db.popitem(last=False)
     return workflow_id
\ No newline at end of file